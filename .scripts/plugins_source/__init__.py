@@ -5,15 +5,19 @@ This module defines the base interface for source type plugins using a custom sy
 Each source type (GitHub, RubyGems, Git, etc.) implements this interface.
 """
 
+import asyncio
 import importlib
-import importlib.util
 import os
+import re
 from abc import ABC, abstractmethod
-from pathlib import Path
-from typing import Optional, List, NamedTuple, Dict, Type
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, ClassVar, Optional, List, Dict, Type, Pattern, Sequence, Tuple
+from urllib.parse import urlparse
 
 
-class VersionInfo(NamedTuple):
+@dataclass(slots=True, frozen=True)
+class VersionInfo:
     """Container for version information from APIs."""
     version: str
     download_url: Optional[str] = None
@@ -22,9 +26,145 @@ class VersionInfo(NamedTuple):
     asset_name: Optional[str] = None
 
 
+# Version pattern used when a recipe configures none
+DEFAULT_VERSION_PATTERNS = (r'^(\d+\.\d+\.\d+)',)
+_DEFAULT_VERSION_PATTERN = re.compile(DEFAULT_VERSION_PATTERNS[0])
+
+
+def _match_default_version(text: str) -> Optional[str]:
+    """Return the leading 'N.N.N' of text, as DEFAULT_VERSION_PATTERNS would."""
+    match = _DEFAULT_VERSION_PATTERN.match(text)
+    return match.group(1) if match else None
+
+
+@lru_cache(maxsize=256)
+def _compile_pattern(pattern: str) -> Pattern[str]:
+    """Compile a version pattern, sharing the result across packages."""
+    return re.compile(pattern)
+
+
+def compile_version_patterns(
+    version_patterns: Sequence[str],
+    package_name: str,
+    quiet: bool = False
+) -> List[Pattern[str]]:
+    """Compile version patterns once, warning about and dropping invalid ones."""
+    compiled = []
+    for pattern in version_patterns:
+        try:
+            compiled.append(_compile_pattern(pattern))
+        except re.error as e:
+            if not quiet:
+                print(f"({package_name}) Invalid regex pattern '{pattern}': {e}")
+    return compiled
+
+
+# Patterns that refer to their own groups by number or name cannot be
+# embedded in a larger regex without changing meaning
+_SELF_REFERENCE = re.compile(r"\\[1-9]|\(\?P[=<]|\(\?\(|^\(\?[aiLmsux]+\)")
+
+
+@lru_cache(maxsize=256)
+def _combine_patterns(patterns: Tuple[str, ...]) -> Optional[Tuple[Pattern[str], Dict[int, int]]]:
+    """
+    Join patterns into one alternation, returning it with a map from each
+    alternative's outer group to the group holding its version, or None if
+    they cannot be combined.
+    """
+    if any(_SELF_REFERENCE.search(pattern) for pattern in patterns):
+        return None
+    version_groups = {}
+    group = 1
+    for pattern in patterns:
+        inner_groups = _compile_pattern(pattern).groups
+        # First capture group of the alternative, or the whole alternative
+        version_groups[group] = group + 1 if inner_groups else group
+        group += inner_groups + 1
+    try:
+        return re.compile("|".join(f"({pattern})" for pattern in patterns)), version_groups
+    except re.error:
+        return None
+
+
+def version_matcher(
+    version_patterns: Sequence[str],
+    package_name: str,
+    quiet: bool = False
+) -> Callable[[str], Optional[str]]:
+    """
+    Build a function extracting the version from a cleaned tag name.
+
+    The version is the first capture group of the first pattern that matches,
+    or its whole match if it has no groups; None if no pattern matches.
+    Several patterns are tried as a single alternation, so each tag takes one
+    pass through the regex engine instead of one per pattern.
+    """
+    # Most recipes configure no patterns; their matcher is built only once
+    if tuple(version_patterns) == DEFAULT_VERSION_PATTERNS:
+        return _match_default_version
+
+    compiled = compile_version_patterns(version_patterns, package_name, quiet)
+    combined = _combine_patterns(tuple(p.pattern for p in compiled)) if len(compiled) > 1 else None
+
+    if combined is not None:
+        pattern, version_groups = combined
+
+        def match_version(text: str) -> Optional[str]:
+            match = pattern.match(text)
+            if match is None:
+                return None
+            # The alternative that matched is the last outer group to close
+            return match.group(version_groups[match.lastindex])
+        return match_version
+
+    def match_each(text: str) -> Optional[str]:
+        for pattern in compiled:
+            match = pattern.match(text)
+            if match:
+                return match.group(1) if match.groups() else match.group(0)
+        return None
+    return match_each
+
+
+@lru_cache(maxsize=4096)
+def version_sort_key(version: str) -> Tuple[Tuple[int, ...], bool, Tuple[Tuple[int, Any], ...]]:
+    """
+    Return a sort key for dotted numeric versions such as '1.2.3'.
+
+    The key is plain tuples, so sorting compares in C instead of building a
+    semver object per element. The middle item is True for releases, which
+    sort after their pre-releases ('1.2.3-rc1' < '1.2.3'). Pre-releases are
+    ordered as in SemVer: identifier by identifier, numeric ones as numbers
+    and before alphanumeric ones ('beta.2' < 'beta.10' < 'beta.x'). Build
+    metadata is ignored. Raises ValueError for non-numeric components.
+    """
+    core = version.partition('+')[0]
+    core, _, prerelease = core.partition('-')
+    identifiers = tuple(
+        (0, int(identifier)) if identifier.isascii() and identifier.isdigit() else (1, identifier)
+        for identifier in prerelease.split('.')
+    ) if prerelease else ()
+    return tuple(int(part) for part in core.split('.')), not prerelease, identifiers
+
+
+def url_host(source_url: str) -> str:
+    """Return the lower-cased host of a URL, or '' when it has none."""
+    return urlparse(source_url.strip()).hostname or ''
+
+
 class SourcePlugin(ABC):
     """Base class for all source type plugins."""
 
+    __slots__ = ()
+
+    # Regex matching exactly the URLs can_handle accepts. Plugins that set it
+    # are dispatched by one combined match instead of a can_handle call each.
+    url_pattern: ClassVar[Optional[Pattern[str]]] = None
+
+    # Plugins that accept URLs on any host are asked after the host-specific
+    # ones, so that e.g. git+https://github.com URLs go to the GitHub plugin
+    catch_all: ClassVar[bool] = False
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -64,46 +204,85 @@ class SourcePlugin(ABC):
 class PluginManager:
     """Manager for loading and using source plugins."""
 
+    __slots__ = ("_plugins", "_plugins_tuple", "_url_pattern", "_pattern_plugins", "_unpatterned_plugins")
+
     def __init__(self):
         self._plugins: Dict[str, SourcePlugin] = {}
+        # The plugin set is fixed once loaded; the tuple is the order in
+        # which URLs are offered to the plugins
+        self._plugins_tuple: Tuple[SourcePlugin, ...] = ()
+        # Alternation of every plugin's url_pattern, one named group each,
+        # mapped to the plugin's position and the plugin
+        self._url_pattern: Optional[Pattern[str]] = None
+        self._pattern_plugins: Dict[str, Tuple[int, SourcePlugin]] = {}
+        self._unpatterned_plugins: Tuple[Tuple[int, SourcePlugin], ...] = ()
         self._load_plugins()
+        # sorted() is stable, so plugins otherwise keep their load order
+        self._plugins_tuple = tuple(sorted(self._plugins.values(), key=lambda plugin: plugin.catch_all))
+        self._index_plugins()
 
     def _load_plugins(self):
         """Load all available source plugins."""
         # Get the directory containing this file
-        plugins_dir = Path(__file__).parent
+        plugins_dir = os.path.dirname(__file__)
+        with os.scandir(plugins_dir) as entries:
+            module_names = sorted(
+                entry.name[:-3] for entry in entries
+                if entry.name.endswith("_plugin.py") and entry.is_file()
+            )
 
-        # Import all plugin modules
-        for plugin_file in plugins_dir.glob("*_plugin.py"):
-            module_name = plugin_file.stem
+        # Import all plugin modules through the regular import system, which
+        # registers them in sys.modules and reuses their cached bytecode
+        for module_name in module_names:
             try:
-                # Import the plugin module
-                spec = importlib.util.spec_from_file_location(
-                    f"plugins_source.{module_name}", plugin_file
-                )
-                if spec and spec.loader:
-                    module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(module)
-
-                    # Find plugin classes in the module
-                    for attr_name in dir(module):
-                        attr = getattr(module, attr_name)
-                        if (isinstance(attr, type) and
-                            issubclass(attr, SourcePlugin) and
-                            attr != SourcePlugin):
-                            # Instantiate the plugin
-                            plugin = attr()
-                            self._plugins[plugin.name] = plugin
+                module = importlib.import_module(f"{__name__}.{module_name}")
+
+                # Plugin classes register themselves by subclassing
+                # SourcePlugin, so there is no need to scan every module symbol
+                for plugin_class in SourcePlugin.__subclasses__():
+                    if plugin_class.__module__ == module.__name__:
+                        plugin = plugin_class()
+                        self._plugins[plugin.name] = plugin
 
             except Exception as e:
                 print(f"Warning: Failed to load plugin {module_name}: {e}")
 
+    def _index_plugins(self):
+        """Combine the plugins' url_patterns into one regex."""
+        # Alternatives are tried in plugin order, so the first one to match
+        # belongs to the first plugin whose can_handle accepts the URL
+        alternatives = []
+        unpatterned = []
+        for position, plugin in enumerate(self._plugins_tuple):
+            if plugin.url_pattern is None:
+                unpatterned.append((position, plugin))
+                continue
+            group = f"p{len(alternatives)}"
+            alternatives.append(f"(?P<{group}>{plugin.url_pattern.pattern})")
+            self._pattern_plugins[group] = (position, plugin)
+        if alternatives:
+            self._url_pattern = re.compile("|".join(alternatives))
+        self._unpatterned_plugins = tuple(unpatterned)
+
     def get_plugin_for_url(self, source_url: str) -> Optional[SourcePlugin]:
-        """Get the appropriate plugin for a given source URL."""
-        for plugin in self._plugins.values():
-            if plugin.can_handle(source_url):
-                return plugin
-        return None
+        """
+        Get the appropriate plugin for a given source URL: the first plugin,
+        in order, whose can_handle accepts it.
+        """
+        position, plugin = len(self._plugins_tuple), None
+        if self._url_pattern is not None:
+            match = self._url_pattern.match(source_url)
+            if match:
+                position, plugin = self._pattern_plugins[match.lastgroup]
+
+        # Plugins without a url_pattern are asked in turn, but only those
+        # ordered before the pattern match can take precedence over it
+        for unpatterned_position, unpatterned_plugin in self._unpatterned_plugins:
+            if unpatterned_position > position:
+                break
+            if unpatterned_plugin.can_handle(source_url):
+                return unpatterned_plugin
+        return plugin
 
     def get_plugin_by_name(self, name: str) -> Optional[SourcePlugin]:
         """Get a plugin by its name."""
@@ -133,6 +312,54 @@ class PluginManager:
             source_url, package_name, version_patterns, mode, quiet, **kwargs
         )
 
+    async def get_latest_versions(
+        self,
+        requests: Sequence[Tuple[Any, ...]],
+        quiet: bool = False,
+        concurrency: int = 8,
+        **kwargs
+    ) -> List[Optional[VersionInfo]]:
+        """
+        Get latest versions for many packages concurrently.
+
+        Each request holds the leading positional arguments of
+        get_latest_version: (source_url, package_name[, version_patterns[, mode]]).
+        Requests run together, with at most `concurrency` in flight per plugin
+        so that no single upstream is flooded, and share one HTTP session
+        unless a `session` is passed. Results are in request order, with None
+        for a request whose lookup failed.
+        """
+        # Imported here so that git-only use does not need aiohttp
+        from .http_client import client_session
+
+        semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        async def fetch(request: Tuple[Any, ...]) -> Optional[VersionInfo]:
+            plugin = self.get_plugin_for_url(request[0])
+            key = plugin.name if plugin else ''
+            semaphore = semaphores.setdefault(key, asyncio.Semaphore(concurrency))
+            async with semaphore:
+                try:
+                    return await self.get_latest_version(*request, quiet=quiet, session=session, **kwargs)
+                except Exception as e:
+                    # One failing package must not discard the batch's other results
+                    if not quiet:
+                        print(f"({request[1]}) Error using {key} plugin: {e}")
+                    return None
+
+        async with client_session(kwargs.pop('session', None)) as session:
+            return list(await asyncio.gather(*(fetch(request) for request in requests)))
+
+
+# Global plugin manager instance, created on first access so that importing
+# the plugin types does not import every plugin module
+_plugin_manager: Optional[PluginManager] = None
+
 
-# Global plugin manager instance
-plugin_manager = PluginManager()
+def __getattr__(name: str):
+    global _plugin_manager
+    if name == "plugin_manager":
+        if _plugin_manager is None:
+            _plugin_manager = PluginManager()
+        return _plugin_manager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
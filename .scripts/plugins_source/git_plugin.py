@@ -5,21 +5,136 @@ This plugin handles general Git repositories that aren't specifically GitHub,
 GitLab, or other specialized Git hosting services.
 """
 
+import asyncio
+import os
 import re
+import shlex
 import subprocess
-from typing import List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
-import sys
 from pathlib import Path
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from plugins_source import SourcePlugin, VersionInfo
+from . import SourcePlugin, VersionInfo, version_matcher
+
+# Version pattern used when a recipe configures none; git tags often carry a 'v'
+DEFAULT_TAG_PATTERNS = (r'^v?(\d+\.\d+\.\d+)',)
+
+# Seconds to wait for a remote listing
+LS_REMOTE_TIMEOUT = 30
+
+# One '<hash>\trefs/tags/<name>' line of ls-remote output
+LS_REMOTE_TAG_PATTERN = re.compile(r'^([0-9a-f]+)\trefs/tags/(.+)$', re.MULTILINE)
+
+# Upper bound on concurrent 'git ls-remote' processes across all packages
+_ls_remote_semaphore = asyncio.Semaphore(max(1, int(os.environ.get('MESO_GIT_CONCURRENCY', '16'))))
+
+# ls-remote results of this run, keyed by arguments
+_ls_remote_results: Dict[Tuple[str, ...], "asyncio.Future[Tuple[int, str, str]]"] = {}
+
+
+def is_ssh_remote(url: str) -> bool:
+    """Return True if git reaches the remote URL over ssh."""
+    scheme, separator, _ = url.partition('://')
+    if separator:
+        return scheme.lower() in ('ssh', 'git+ssh', 'ssh+git')
+    # scp-like syntax, 'user@host:path', has a colon before any slash
+    return ':' in url.partition('/')[0]
+
+
+def configured_ssh_command() -> bool:
+    """Return True if git config sets core.sshCommand (blocking)."""
+    try:
+        result = subprocess.run(
+            ['git', 'config', '--get', 'core.sshCommand'],
+            stdin=subprocess.DEVNULL, capture_output=True, text=True
+        )
+    except OSError:
+        return False
+    return result.returncode == 0 and bool(result.stdout.strip())
+
+
+@lru_cache(maxsize=None)
+def git_environment(ssh: bool = False) -> Dict[str, str]:
+    """
+    Environment for non-interactive git processes.
+
+    Credential prompts are disabled, since a prompt would only stall the run
+    until the timeout. For ssh remotes, unless the user configured their own
+    ssh command (GIT_SSH_COMMAND, GIT_SSH or core.sshCommand, which
+    GIT_SSH_COMMAND would override), connections to a host share one
+    multiplexed master, so repeated listings skip the ssh handshake.
+    """
+    env = dict(os.environ)
+    env.setdefault('GIT_TERMINAL_PROMPT', '0')
+    if ssh and 'GIT_SSH_COMMAND' not in env and 'GIT_SSH' not in env and not configured_ssh_command():
+        control_dir = Path.home() / ".cache" / "meso-forge-version-ctl" / "ssh"
+        try:
+            control_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        except OSError:
+            return env
+        env['GIT_SSH_COMMAND'] = (
+            f"ssh -o BatchMode=yes -o ControlMaster=auto"
+            f" -o ControlPath={shlex.quote(f'{control_dir}/%C')} -o ControlPersist=60s"
+        )
+    return env
+
+
+async def ls_remote(*args: str) -> Tuple[int, str, str]:
+    """
+    Run 'git ls-remote' without blocking the event loop.
+
+    Returns (returncode, stdout, stderr). Concurrent and repeated calls with
+    the same arguments within a run share one process, since recipes built
+    from the same repository would otherwise list it once each. Raises
+    asyncio.TimeoutError after LS_REMOTE_TIMEOUT seconds, and
+    FileNotFoundError if git is not installed.
+    """
+    result = _ls_remote_results.get(args)
+    if result is None:
+        result = asyncio.ensure_future(_ls_remote(*args))
+        _ls_remote_results[args] = result
+        # Let a later caller retry after a failure
+        result.add_done_callback(
+            lambda done: _ls_remote_results.pop(args, None)
+            if done.cancelled() or done.exception() or done.result()[0] != 0 else None
+        )
+    # A cancelled caller must not cancel the listing other callers share
+    return await asyncio.shield(result)
+
+
+async def _ls_remote(*args: str) -> Tuple[int, str, str]:
+    """Run one 'git ls-remote' process under the concurrency limit."""
+    # The first argument that is not an option is the repository
+    remote = next((arg for arg in args if not arg.startswith('-')), '')
+    async with _ls_remote_semaphore:
+        process = await asyncio.create_subprocess_exec(
+            'git', 'ls-remote', *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=git_environment(is_ssh_remote(remote))
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), LS_REMOTE_TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+    return process.returncode, stdout.decode(errors='replace'), stderr.decode(errors='replace')
 
 
 class GitPlugin(SourcePlugin):
     """Plugin for handling general Git repositories."""
 
+    catch_all = True
+
+    url_pattern = re.compile(
+        # A git scheme anywhere in the URL, or a .git URL on any other host
+        r".*?(?:git://|git\+https://|git\+ssh://|ssh://git@)"
+        r"|(?![^:/?#]+://(?:github\.com|gitlab\.com|bitbucket\.org)(?:[/?#]|$)).*\.git$"
+    )
+
     @property
     def name(self) -> str:
         return "git"
@@ -35,18 +150,8 @@ class GitPlugin(SourcePlugin):
 
     def can_handle(self, source_url: str) -> bool:
         """Check if this plugin can handle the given URL."""
-        # Handle git-specific schemes
-        if any(scheme in source_url for scheme in self.supported_schemes):
-            return True
-
-        # Handle URLs that end with .git but aren't GitHub/GitLab
-        if source_url.endswith('.git'):
-            parsed = urlparse(source_url)
-            # Exclude known hosting services (handled by their specific plugins)
-            excluded_hosts = ['github.com', 'gitlab.com', 'bitbucket.org']
-            return parsed.netloc not in excluded_hosts
-
-        return False
+        # Git-specific schemes, or .git URLs not on a known hosting service
+        return self.url_pattern.match(source_url) is not None
 
     def extract_source_info(self, source_url: str) -> dict:
         """Extract repository information from Git URL."""
@@ -87,19 +192,19 @@ class GitPlugin(SourcePlugin):
         clone_url = source_info['clone_url']
 
         if mode == 'git-tags':
-            return self._get_latest_tag(clone_url, package_name, version_patterns, quiet)
+            return await self._get_latest_tag(clone_url, package_name, version_patterns, quiet)
         elif mode == 'git-branches':
-            return self._get_latest_branch(clone_url, package_name, version_patterns, quiet)
+            return await self._get_latest_branch(clone_url, package_name, version_patterns, quiet)
         else:
             # Default: try tags first, then main/master branch
-            version_info = self._get_latest_tag(clone_url, package_name, version_patterns, quiet)
+            version_info = await self._get_latest_tag(clone_url, package_name, version_patterns, quiet)
             if version_info is None:
                 if not quiet:
                     print(f"({package_name}) No matching tags found, trying default branch...")
-                version_info = self._get_latest_branch(clone_url, package_name, version_patterns, quiet)
+                version_info = await self._get_latest_branch(clone_url, package_name, version_patterns, quiet)
             return version_info
 
-    def _get_latest_tag(
+    async def _get_latest_tag(
         self,
         clone_url: str,
         package_name: str,
@@ -108,88 +213,52 @@ class GitPlugin(SourcePlugin):
     ) -> Optional[VersionInfo]:
         """Get latest tag from Git repository."""
         if not version_patterns:
-            version_patterns = [r'^v?(\d+\.\d+\.\d+)']
+            version_patterns = DEFAULT_TAG_PATTERNS
 
         try:
-            # Use git ls-remote to get tags without cloning
-            result = subprocess.run(
-                ['git', 'ls-remote', '--tags', '--sort=-version:refname', clone_url],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            # Use git ls-remote to get tags without cloning; --refs leaves out
+            # the peeled '<tag>^{}' entries, halving the listing for annotated tags
+            returncode, stdout, stderr = await ls_remote('--refs', '--tags', '--sort=-version:refname', clone_url)
 
-            if result.returncode != 0:
+            if returncode != 0:
                 if not quiet:
-                    print(f"({package_name}) Failed to fetch tags: {result.stderr}")
+                    print(f"({package_name}) Failed to fetch tags: {stderr}")
                 return None
 
-            tags = []
-            for line in result.stdout.strip().split('\n'):
-                if not line:
-                    continue
-
-                parts = line.split('\t')
-                if len(parts) != 2:
-                    continue
-
-                commit_hash, ref = parts
-                if not ref.startswith('refs/tags/'):
-                    continue
-
-                tag_name = ref.replace('refs/tags/', '')
-
-                # Skip tag references that point to other tags (^{})
-                if tag_name.endswith('^{}'):
-                    continue
-
-                tags.append((tag_name, commit_hash))
+            tags = LS_REMOTE_TAG_PATTERN.findall(stdout)
 
             if not tags:
                 if not quiet:
                     print(f"({package_name}) No tags found in repository")
                 return None
 
-            # Find valid tags matching patterns
-            valid_tags = []
-            for tag_name, commit_hash in tags:
-                cleaned_tag = self._clean_tag_name(tag_name, package_name)
-
-                for pattern in version_patterns:
-                    try:
-                        match = re.match(pattern, cleaned_tag)
-                        if match:
-                            version = match.group(1) if match.groups() else match.group(0)
-
-                            # Create archive URL (this is repository-specific)
-                            download_url = self._create_archive_url(clone_url, tag_name)
-
-                            valid_tags.append(VersionInfo(
-                                version=version,
-                                download_url=download_url,
-                                tag_name=tag_name,
-                                source_type="git"
-                            ))
-                            break
-                    except re.error as e:
-                        if not quiet:
-                            print(f"({package_name}) Invalid regex pattern '{pattern}': {e}")
-                        continue
-
-            if not valid_tags:
+            # Tags are listed newest version first (--sort=-version:refname),
+            # so the first one matching a pattern is the answer
+            match_version = version_matcher(version_patterns, package_name, quiet)
+            for commit_hash, tag_name in tags:
+                version = match_version(self._clean_tag_name(tag_name, package_name))
+                if version is None:
+                    continue
+
+                # Create archive URL (this is repository-specific)
+                download_url = self._create_archive_url(clone_url, tag_name)
+
                 if not quiet:
-                    print(f"({package_name}) No tags match version patterns: {version_patterns}")
-                return None
+                    print(f"({package_name}) Latest matching tag of {len(tags)}: {version}")
+                    print(f"({package_name}) Download URL: {download_url}")
 
-            # Return the first (most recent) matching tag
-            latest = valid_tags[0]
-            if not quiet:
-                print(f"({package_name}) Found {len(valid_tags)} matching tags, latest: {latest.version}")
-                print(f"({package_name}) Download URL: {latest.download_url}")
+                return VersionInfo(
+                    version=version,
+                    download_url=download_url,
+                    tag_name=tag_name,
+                    source_type="git"
+                )
 
-            return latest
+            if not quiet:
+                print(f"({package_name}) No tags match version patterns: {version_patterns}")
+            return None
 
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             if not quiet:
                 print(f"({package_name}) Timeout fetching Git tags")
         except FileNotFoundError:
@@ -201,7 +270,7 @@ class GitPlugin(SourcePlugin):
 
         return None
 
-    def _get_latest_branch(
+    async def _get_latest_branch(
         self,
         clone_url: str,
         package_name: str,
@@ -211,28 +280,22 @@ class GitPlugin(SourcePlugin):
         """Get latest commit from default branch."""
         try:
             # Get default branch
-            result = subprocess.run(
-                ['git', 'ls-remote', '--symref', clone_url, 'HEAD'],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            returncode, stdout, stderr = await ls_remote('--symref', clone_url, 'HEAD')
 
-            if result.returncode != 0:
+            if returncode != 0:
                 if not quiet:
-                    print(f"({package_name}) Failed to fetch branch info: {result.stderr}")
+                    print(f"({package_name}) Failed to fetch branch info: {stderr}")
                 return None
 
             # Parse the output to find default branch and latest commit
-            lines = result.stdout.strip().split('\n')
             default_branch = 'main'  # fallback
             commit_hash = None
 
-            for line in lines:
+            for line in stdout.splitlines():
                 if line.startswith('ref: refs/heads/'):
-                    default_branch = line.split('refs/heads/')[1].split('\t')[0]
+                    default_branch = line[len('ref: refs/heads/'):].partition('\t')[0]
                 elif '\trefs/heads/' in line or '\tHEAD' in line:
-                    commit_hash = line.split('\t')[0]
+                    commit_hash = line.partition('\t')[0]
 
             if not commit_hash:
                 if not quiet:
@@ -255,7 +318,7 @@ class GitPlugin(SourcePlugin):
                 source_type="git"
             )
 
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             if not quiet:
                 print(f"({package_name}) Timeout fetching Git branch info")
         except FileNotFoundError:
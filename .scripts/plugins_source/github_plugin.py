@@ -4,22 +4,174 @@ GitHub source plugin for version control.
 This plugin handles GitHub repositories, supporting releases, tags, and assets.
 """
 
+import asyncio
+import json
 import os
 import re
-import requests
-import semver
-from typing import List, Optional
-import sys
-from pathlib import Path
+import aiohttp
+from typing import Any, Dict, List, Optional, Set, Tuple
+from functools import lru_cache
+
+from . import DEFAULT_VERSION_PATTERNS, SourcePlugin, VersionInfo, version_matcher, version_sort_key
+from .http_client import API_TIMEOUT, client_session, fetch_json
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+
+# Repositories per GraphQL query, and how long to wait for concurrent lookups
+# to join a query before sending it
+GRAPHQL_BATCH_SIZE = 50
+GRAPHQL_BATCH_WINDOW = 0.05
+
+# Releases and tags requested per repository
+GRAPHQL_REFS_PER_REPO = 100
+
+# Batched lookups for this run: (owner, repo) -> future of the repository's
+# releases and tags in REST shape, or None when GraphQL could not answer
+_graphql_refs: Dict[Tuple[str, str], "asyncio.Future[Optional[Dict[str, list]]]"] = {}
+_graphql_queue: List[Tuple[str, str]] = []
+
+# The event loop only keeps weak references to tasks
+_graphql_flushes: Set["asyncio.Task[None]"] = set()
+
+
+async def get_repository_refs(
+    session: aiohttp.ClientSession,
+    owner: str,
+    repo: str,
+    headers: Dict[str, str]
+) -> Optional[Dict[str, list]]:
+    """
+    Get a repository's recent releases and tags through batched GraphQL queries.
+
+    Lookups made within GRAPHQL_BATCH_WINDOW of each other share one query, so
+    a run over many recipes costs a handful of requests instead of one or two
+    per repository. GraphQL requires authentication, so without a token this
+    returns None and callers use the REST API.
+    """
+    if 'Authorization' not in headers:
+        return None
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from plugins_source import SourcePlugin, VersionInfo
+    key = (owner, repo)
+    refs = _graphql_refs.get(key)
+    if refs is None:
+        refs = asyncio.get_running_loop().create_future()
+        _graphql_refs[key] = refs
+        _graphql_queue.append(key)
+        if len(_graphql_queue) == 1:
+            flush = asyncio.ensure_future(_flush_graphql_queue(session, headers))
+            _graphql_flushes.add(flush)
+            flush.add_done_callback(_graphql_flushes.discard)
+    return await asyncio.shield(refs)
+
+
+async def _flush_graphql_queue(session: aiohttp.ClientSession, headers: Dict[str, str]) -> None:
+    """Send every queued lookup once the batching window has passed."""
+    await asyncio.sleep(GRAPHQL_BATCH_WINDOW)
+    keys = list(_graphql_queue)
+    _graphql_queue.clear()
+    await asyncio.gather(*(
+        _query_repository_refs(session, headers, keys[i:i + GRAPHQL_BATCH_SIZE])
+        for i in range(0, len(keys), GRAPHQL_BATCH_SIZE)
+    ))
+
+
+async def _query_repository_refs(
+    session: aiohttp.ClientSession,
+    headers: Dict[str, str],
+    keys: List[Tuple[str, str]]
+) -> None:
+    """Resolve the futures of one batch of repositories with a single query."""
+    fields = []
+    for i, (owner, repo) in enumerate(keys):
+        # JSON string literals are valid GraphQL string literals
+        fields.append(
+            f"r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(repo)}) {{"
+            f" releases(first: {GRAPHQL_REFS_PER_REPO}, orderBy: {{field: CREATED_AT, direction: DESC}})"
+            f" {{ nodes {{ tagName isDraft isPrerelease }} }}"
+            f" refs(refPrefix: \"refs/tags/\", first: {GRAPHQL_REFS_PER_REPO},"
+            f" orderBy: {{field: TAG_COMMIT_DATE, direction: DESC}}) {{ nodes {{ name }} }}"
+            f" }}"
+        )
+    query = "query { " + " ".join(fields) + " }"
+
+    # None when the query itself failed, as opposed to answering without
+    # some of the repositories
+    data: Optional[Dict[str, Any]] = None
+    try:
+        async with session.post(GRAPHQL_URL, json={'query': query}, headers=headers,
+                                timeout=API_TIMEOUT) as response:
+            if response.status == 200:
+                data = (await response.json()).get('data') or {}
+    except Exception:
+        # Including errors such as a session closed by the caller that queued
+        # the batch; the callers fall back to the REST API
+        pass
+    finally:
+        # Every future must be resolved, or its callers would wait forever
+        for i, key in enumerate(keys):
+            if data is None:
+                # Let a later lookup retry instead of reusing the failure
+                future = _graphql_refs.pop(key)
+                refs = None
+            else:
+                future = _graphql_refs[key]
+                try:
+                    refs = _rest_shaped_refs(data.get(f"r{i}"))
+                except (KeyError, TypeError):
+                    refs = None
+            if not future.done():
+                future.set_result(refs)
+
+
+def _rest_shaped_refs(repository: Optional[Dict[str, Any]]) -> Optional[Dict[str, list]]:
+    """Convert a GraphQL repository result to REST-shaped release and tag lists."""
+    if not repository:
+        return None
+    return {
+        'releases': [
+            {
+                'tag_name': node['tagName'],
+                'draft': node['isDraft'],
+                'prerelease': node['isPrerelease'],
+            }
+            for node in repository['releases']['nodes']
+        ],
+        'tags': [{'name': node['name']} for node in repository['refs']['nodes']],
+    }
+
+
+# Owner and repository of https://github.com/owner/repo[.git]/... and
+# https://api.github.com/repos/owner/repo/... URLs
+GITHUB_REPO_PATTERN = re.compile(
+    r"[A-Za-z][\w+.-]*://(?:[^@/?#]*@)?"
+    r"(?:(?i:api\.github\.com)(?::\d*)?/+repos|(?i:github\.com)(?::\d*)?)"
+    r"/+([^/?#]+)/([^/?#]+?)(?:\.git)?(?:[/?#]|$)"
+)
+
+# Tag prefixes stripped before version matching, compared case-insensitively;
+# only the first match in this order is removed
+TAG_PREFIXES = ('v', 'version', 'release')
+
+
+@lru_cache(maxsize=4096)
+def clean_tag_name(tag_name: str) -> str:
+    """Strip a common prefix such as 'v' or 'release' from a tag name."""
+    lowered = tag_name.lower()
+    for prefix in TAG_PREFIXES:
+        if lowered.startswith(prefix):
+            return tag_name[len(prefix):]
+    return tag_name
 
 
 class GitHubPlugin(SourcePlugin):
     """Plugin for handling GitHub repositories."""
 
+    # HTTPS URLs on github.com; other schemes such as git+ssh:// are left to
+    # the git plugin
+    url_pattern = re.compile(
+        r"\s*(?:git\+)?https://(?:[^@/?#]*@)?(?i:(?:api\.)?github\.com)(?::\d*)?(?:[/?#]|$)"
+    )
+
     @property
     def name(self) -> str:
         return "github"
@@ -34,26 +186,14 @@ class GitHubPlugin(SourcePlugin):
 
     def can_handle(self, source_url: str) -> bool:
         """Check if this plugin can handle the given URL."""
-        return any(scheme in source_url for scheme in self.supported_schemes)
+        return self.url_pattern.match(source_url) is not None
 
     def extract_source_info(self, source_url: str) -> dict:
         """Extract owner and repo from GitHub URL."""
-        try:
-            if 'api.github.com/repos/' in source_url:
-                # Handle GitHub API URLs like https://api.github.com/repos/owner/repo/...
-                parts = source_url.split('api.github.com/repos/')[1].split('/')
-                owner, repo = parts[0], parts[1]
-            else:
-                # Handle regular GitHub URLs like https://github.com/owner/repo
-                parts = source_url.split('github.com/')[1].split('/')
-                owner, repo = parts[0], parts[1]
-                # Remove .git suffix if present
-                if repo.endswith('.git'):
-                    repo = repo[:-4]
-
-            return {'owner': owner, 'repo': repo}
-        except (IndexError, ValueError) as e:
-            raise ValueError(f"Invalid GitHub URL format: {source_url}") from e
+        match = GITHUB_REPO_PATTERN.match(source_url.strip())
+        if not match:
+            raise ValueError(f"Invalid GitHub URL format: {source_url}")
+        return {'owner': match.group(1), 'repo': match.group(2)}
 
     async def get_latest_version(
         self,
@@ -69,20 +209,21 @@ class GitHubPlugin(SourcePlugin):
         owner = source_info['owner']
         repo = source_info['repo']
 
-        # Determine the specific GitHub mode
-        if mode == 'github-tags':
-            return self._get_latest_tag(owner, repo, package_name, version_patterns, quiet)
-        elif mode == 'github-release':
-            return self._get_latest_release(owner, repo, package_name, version_patterns, quiet)
+        async with client_session(kwargs.get('session')) as session:
+            # Determine the specific GitHub mode
+            if mode == 'github-tags':
+                return await self._get_latest_tag(session, owner, repo, package_name, version_patterns, quiet)
+            elif mode == 'github-release':
+                return await self._get_latest_release(session, owner, repo, package_name, version_patterns, quiet)
 
-        else:
-            # Auto-detect: try releases first, then tags as fallback
-            version_info = self._get_latest_release(owner, repo, package_name, version_patterns, quiet)
-            if version_info is None:
-                if not quiet:
-                    print(f"({package_name}) No matching releases found, trying tags...")
-                version_info = self._get_latest_tag(owner, repo, package_name, version_patterns, quiet)
-            return version_info
+            else:
+                # Auto-detect: try releases first, then tags as fallback
+                version_info = await self._get_latest_release(session, owner, repo, package_name, version_patterns, quiet)
+                if version_info is None:
+                    if not quiet:
+                        print(f"({package_name}) No matching releases found, trying tags...")
+                    version_info = await self._get_latest_tag(session, owner, repo, package_name, version_patterns, quiet)
+                return version_info
 
     def _get_headers(self) -> dict:
         """Get headers for GitHub API requests."""
@@ -92,8 +233,9 @@ class GitHubPlugin(SourcePlugin):
             headers['Authorization'] = f'token {token}'
         return headers
 
-    def _get_latest_release(
+    async def _get_latest_release(
         self,
+        session: aiohttp.ClientSession,
         owner: str,
         repo: str,
         package_name: str,
@@ -102,23 +244,33 @@ class GitHubPlugin(SourcePlugin):
     ) -> Optional[VersionInfo]:
         """Get latest release version from GitHub releases API."""
         api_url = f"https://api.github.com/repos/{owner}/{repo}/releases"
+        # Only the tag name varies between download URLs
+        archive_prefix = f"https://github.com/{owner}/{repo}/archive/refs/tags/"
 
         # Default version pattern if none provided
         if not version_patterns:
-            version_patterns = [r'^(\d+\.\d+\.\d+)']
+            version_patterns = DEFAULT_VERSION_PATTERNS
+
+        # Compile once per call; invalid patterns are reported here, not per tag
+        match_version = version_matcher(version_patterns, package_name, quiet)
 
         headers = self._get_headers()
 
         try:
-            response = requests.get(api_url, headers=headers, timeout=30)
-            if response.status_code == 200:
-                releases = response.json()
-
+            refs = await get_repository_refs(session, owner, repo, headers)
+            if refs is not None:
+                status, releases = 200, refs['releases']
+            else:
+                # One full page, so the fallback sees as many releases in a
+                # single request as the API allows
+                status, releases = await fetch_json(session, f"{api_url}?per_page=100", headers)
+            if status == 200:
                 if not releases:
                     if not quiet:
                         print(f"({package_name}) No releases found for {owner}/{repo}")
                     return None
 
+                # (version, tag name) pairs; only the winner becomes a VersionInfo
                 valid_releases = []
 
                 for release in releases:
@@ -130,31 +282,10 @@ class GitHubPlugin(SourcePlugin):
                     if not tag_name:
                         continue
 
-                    # Clean up tag name for version extraction
-                    cleaned_tag = self._clean_tag_name(tag_name, package_name)
-
-                    # Check if version matches any of the patterns
-                    for pattern in version_patterns:
-                        try:
-                            match = re.match(pattern, cleaned_tag)
-                            if match:
-                                # Extract the version (first capture group or full match)
-                                version = match.group(1) if match.groups() else match.group(0)
-
-                                # Construct the release URL
-                                tarball_url = f"https://github.com/{owner}/{repo}/archive/refs/tags/{tag_name}.tar.gz"
-
-                                valid_releases.append(VersionInfo(
-                                    version=version,
-                                    download_url=tarball_url,
-                                    tag_name=tag_name,
-                                    source_type="github"
-                                ))
-                                break
-                        except re.error as e:
-                            if not quiet:
-                                print(f"({package_name}) Invalid regex pattern '{pattern}': {e}")
-                            continue
+                    # Extract the version from the cleaned tag name
+                    version = match_version(self._clean_tag_name(tag_name, package_name))
+                    if version is not None:
+                        valid_releases.append((version, tag_name))
 
                 if not valid_releases:
                     if not quiet:
@@ -162,18 +293,18 @@ class GitHubPlugin(SourcePlugin):
                     return None
 
                 # Sort versions and return the latest
-                return self._sort_and_get_latest(valid_releases, package_name, quiet)
+                return self._sort_and_get_latest(valid_releases, archive_prefix, package_name, quiet)
 
-            elif response.status_code == 404:
+            elif status == 404:
                 if not quiet:
                     print(f"({package_name}) No releases found for {owner}/{repo}")
             else:
                 if not quiet:
-                    print(f"({package_name}) Could not fetch releases: {response.status_code}")
-        except requests.exceptions.Timeout:
+                    print(f"({package_name}) Could not fetch releases: {status}")
+        except asyncio.TimeoutError:
             if not quiet:
                 print(f"({package_name}) Timeout fetching GitHub releases")
-        except requests.exceptions.ConnectionError:
+        except aiohttp.ClientConnectionError:
             if not quiet:
                 print(f"({package_name}) Connection error fetching GitHub releases")
         except Exception as e:
@@ -182,8 +313,9 @@ class GitHubPlugin(SourcePlugin):
 
         return None
 
-    def _get_latest_tag(
+    async def _get_latest_tag(
         self,
+        session: aiohttp.ClientSession,
         owner: str,
         repo: str,
         package_name: str,
@@ -192,18 +324,25 @@ class GitHubPlugin(SourcePlugin):
     ) -> Optional[VersionInfo]:
         """Get latest tag version from GitHub tags API."""
         api_url = f"https://api.github.com/repos/{owner}/{repo}/tags"
+        # Only the tag name varies between download URLs
+        archive_prefix = f"https://github.com/{owner}/{repo}/archive/refs/tags/"
 
         # Default version pattern if none provided
         if not version_patterns:
-            version_patterns = [r'^(\d+\.\d+\.\d+)']
+            version_patterns = DEFAULT_VERSION_PATTERNS
+
+        # Compile once per call; invalid patterns are reported here, not per tag
+        match_version = version_matcher(version_patterns, package_name, quiet)
 
         headers = self._get_headers()
 
         try:
-            response = requests.get(api_url, headers=headers, timeout=30)
-            if response.status_code == 200:
-                tags = response.json()
-
+            refs = await get_repository_refs(session, owner, repo, headers)
+            if refs is not None:
+                status, tags = 200, refs['tags']
+            else:
+                status, tags = await fetch_json(session, api_url, headers)
+            if status == 200:
                 if not tags:
                     if not quiet:
                         print(f"({package_name}) No tags found for {owner}/{repo}")
@@ -212,6 +351,7 @@ class GitHubPlugin(SourcePlugin):
                 if not quiet:
                     print(f"({package_name}) Found {len(tags)} total tags")
 
+                # (version, tag name) pairs; only the winner becomes a VersionInfo
                 valid_tags = []
 
                 for tag in tags:
@@ -219,31 +359,12 @@ class GitHubPlugin(SourcePlugin):
                     if not tag_name:
                         continue
 
-                    # Clean up tag name for version extraction
-                    cleaned_tag = self._clean_tag_name(tag_name, package_name)
-
-                    # Check if version matches any of the patterns
-                    for pattern in version_patterns:
-                        try:
-                            match = re.match(pattern, cleaned_tag)
-                            if match:
-                                # Extract the version (first capture group or full match)
-                                version = match.group(1) if match.groups() else match.group(0)
-
-                                # Construct the release URL
-                                tarball_url = f"https://github.com/{owner}/{repo}/archive/refs/tags/{tag_name}.tar.gz"
-
-                                valid_tags.append(VersionInfo(
-                                    version=version,
-                                    download_url=tarball_url,
-                                    tag_name=tag_name,
-                                    source_type="github"
-                                ))
-                                break
-                        except re.error as e:
-                            if not quiet:
-                                print(f"({package_name}) Invalid regex pattern '{pattern}': {e}")
-                            continue
+                    # Extract the version from the cleaned tag name
+                    version = match_version(self._clean_tag_name(tag_name, package_name))
+                    if version is None:
+                        continue
+
+                    valid_tags.append((version, tag_name))
 
                 if not valid_tags:
                     if not quiet:
@@ -251,18 +372,18 @@ class GitHubPlugin(SourcePlugin):
                     return None
 
                 # Sort versions and return the latest
-                return self._sort_and_get_latest(valid_tags, package_name, quiet)
+                return self._sort_and_get_latest(valid_tags, archive_prefix, package_name, quiet)
 
-            elif response.status_code == 404:
+            elif status == 404:
                 if not quiet:
                     print(f"({package_name}) No tags found for {owner}/{repo}")
             else:
                 if not quiet:
-                    print(f"({package_name}) Could not fetch tags: {response.status_code}")
-        except requests.exceptions.Timeout:
+                    print(f"({package_name}) Could not fetch tags: {status}")
+        except asyncio.TimeoutError:
             if not quiet:
                 print(f"({package_name}) Timeout fetching GitHub tags")
-        except requests.exceptions.ConnectionError:
+        except aiohttp.ClientConnectionError:
             if not quiet:
                 print(f"({package_name}) Connection error fetching GitHub tags")
         except Exception as e:
@@ -273,36 +394,38 @@ class GitHubPlugin(SourcePlugin):
 
     def _clean_tag_name(self, tag_name: str, package_name: str) -> str:
         """Clean up tag name for version extraction."""
-        # Remove common prefixes like 'v', 'V', 'version', 'release', or package name
-        cleaned = tag_name
-        prefixes = ['v', 'V', 'version', 'release', 'Release', 'VERSION', 'RELEASE']
-        for prefix in prefixes:
-            if cleaned.lower().startswith(prefix.lower()):
-                cleaned = cleaned[len(prefix):]
-                break
-        return cleaned
+        return clean_tag_name(tag_name)
 
     def _sort_and_get_latest(
         self,
-        versions: List[VersionInfo],
+        versions: List[Tuple[str, str]],
+        archive_prefix: str,
         package_name: str,
         quiet: bool = False
     ) -> Optional[VersionInfo]:
-        """Sort versions and return the latest."""
+        """
+        Return the latest of (version, tag name) pairs as a VersionInfo; ties
+        go to the earliest listed.
+        """
         if not versions:
             return None
 
         try:
-            # Sort by semantic version
-            versions.sort(key=lambda x: semver.VersionInfo.parse(x.version), reverse=True)
-            latest = versions[0]
-            if not quiet:
-                print(f"({package_name}) Found {len(versions)} matching versions, latest: {latest.version}")
-                print(f"({package_name}) Download URL: {latest.download_url}")
-            return latest
+            # Only the maximum is needed, so a single pass replaces the sort
+            version, tag_name = max(versions, key=lambda x: version_sort_key(x[0]))
         except (ValueError, TypeError) as e:
             if not quiet:
                 print(f"({package_name}) Error parsing semantic versions, using string sort: {e}")
-            # Fallback to string sort
-            versions.sort(key=lambda x: x.version, reverse=True)
-            return versions[0]
+            # Fallback to string comparison
+            version, tag_name = max(versions, key=lambda x: x[0])
+
+        latest = VersionInfo(
+            version=version,
+            download_url=archive_prefix + tag_name + ".tar.gz",
+            tag_name=tag_name,
+            source_type="github"
+        )
+        if not quiet:
+            print(f"({package_name}) Found {len(versions)} matching versions, latest: {latest.version}")
+            print(f"({package_name}) Download URL: {latest.download_url}")
+        return latest
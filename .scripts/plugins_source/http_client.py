@@ -0,0 +1,235 @@
+"""
+Shared HTTP helpers for source plugins.
+
+All network access goes through a single aiohttp.ClientSession so that
+connections (and their TLS handshakes) are reused across packages. Responses
+worth keeping between runs live in one SQLite database in the cache directory.
+"""
+
+import asyncio
+import json
+import random
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, NamedTuple, Optional, Tuple
+
+import aiohttp
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Timeout for small API requests
+API_TIMEOUT = aiohttp.ClientTimeout(total=30)
+
+# Timeout for artifact downloads: bound stalls, not total transfer time
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=30)
+
+# Transient failures are retried with jittered exponential backoff, up to
+# RETRY_ATTEMPTS requests in all
+RETRY_ATTEMPTS = 4
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# JSON responses fetched during this run, keyed by URL, so that recipes
+# sharing an upstream wait on a single request instead of repeating it
+_json_responses: Dict[str, "asyncio.Future[Tuple[int, Any]]"] = {}
+
+# Connection to the persistent cache, opened on first use and shared by the
+# worker threads that run cache queries; sqlite3 connections are not safe to
+# use from two threads at once, hence the lock
+_cache_db: Optional[sqlite3.Connection] = None
+# Set once the database cannot be opened, e.g. for an unwritable home
+# directory; the rest of the run then goes without the cache
+_cache_disabled = False
+_cache_db_lock = threading.Lock()
+
+
+class CacheEntry(NamedTuple):
+    """A cached value with the validator and time it was stored with."""
+    etag: Optional[str]
+    body: Any
+    timestamp: float
+
+
+def get_cache_directory() -> Path:
+    """Get cache directory for temporary files."""
+    cache_dir = Path.home() / ".cache" / "meso-forge-version-ctl"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def create_session() -> aiohttp.ClientSession:
+    """Create the client session shared by all fetches in a run."""
+    # Cache DNS for the whole run (aiohttp's default is 10 s); the same few
+    # hosts are contacted hundreds of times
+    connector = aiohttp.TCPConnector(limit=100, limit_per_host=8, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector)
+
+
+@asynccontextmanager
+async def client_session(
+    session: Optional[aiohttp.ClientSession] = None
+) -> AsyncIterator[aiohttp.ClientSession]:
+    """Yield the given session, or a temporary one when none was provided."""
+    if session is not None:
+        yield session
+        return
+
+    async with create_session() as temporary_session:
+        yield temporary_session
+
+
+async def fetch_json(
+    session: aiohttp.ClientSession,
+    url: str,
+    headers: Optional[Dict[str, str]] = None
+) -> Tuple[int, Any]:
+    """
+    GET a JSON document, returning (status, body).
+
+    Concurrent and repeated requests for the same URL within a run share one
+    response. Bodies are kept in the persistent cache with their ETag and
+    Last-Modified validators so later runs can revalidate with If-None-Match
+    and If-Modified-Since; a 304 reuses the stored body (and does not count
+    against GitHub's rate limit).
+    """
+    response = _json_responses.get(url)
+    if response is None:
+        response = asyncio.ensure_future(_fetch_json(session, url, headers))
+        _json_responses[url] = response
+        # Let a later caller retry after a transient failure
+        response.add_done_callback(
+            lambda done: _json_responses.pop(url, None)
+            if done.cancelled() or done.exception() else None
+        )
+    # A cancelled caller must not cancel the request other callers share
+    return await asyncio.shield(response)
+
+
+async def _fetch_json(
+    session: aiohttp.ClientSession,
+    url: str,
+    headers: Optional[Dict[str, str]] = None
+) -> Tuple[int, Any]:
+    """
+    Perform a conditional GET backed by the persistent response cache.
+
+    Connection errors, timeouts and RETRY_STATUSES responses are retried.
+    """
+    # Entries hold {'body': ..., 'last_modified': ...} plus the ETag
+    key = f"json:{url}"
+    cached = await cache_get(key)
+
+    request_headers = dict(headers or {})
+    if cached:
+        if cached.etag:
+            request_headers['If-None-Match'] = cached.etag
+        if cached.body.get('last_modified'):
+            request_headers['If-Modified-Since'] = cached.body['last_modified']
+
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        try:
+            async with session.get(url, headers=request_headers, timeout=API_TIMEOUT) as response:
+                status = response.status
+                if status == 200:
+                    body = parse_json(await response.read())
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt == RETRY_ATTEMPTS:
+                raise
+        else:
+            if status not in RETRY_STATUSES or attempt == RETRY_ATTEMPTS:
+                break
+        await asyncio.sleep(retry_delay(attempt))
+
+    if status == 304 and cached:
+        return 200, cached.body['body']
+    if status != 200:
+        return status, None
+    if etag or last_modified:
+        await cache_put(key, {'body': body, 'last_modified': last_modified}, etag)
+    return 200, body
+
+
+def retry_delay(attempt: int) -> float:
+    """Seconds to wait after failed attempt number `attempt` (from 1)."""
+    # Full jitter keeps concurrent requests from retrying in lockstep
+    return random.uniform(0, min(3.0, 0.2 * 2 ** attempt))
+
+
+def parse_json(data: bytes) -> Any:
+    """Parse a JSON response body, using orjson when available."""
+    # orjson reads the bytes directly, skipping the decode to str
+    return orjson.loads(data) if HAS_ORJSON else json.loads(data)
+
+
+async def cache_get(key: str) -> Optional[CacheEntry]:
+    """Look up a value in the persistent cache."""
+    return await asyncio.to_thread(read_cache_entry, key)
+
+
+async def cache_put(key: str, body: Any, etag: Optional[str] = None) -> None:
+    """Store a JSON-serialisable value in the persistent cache."""
+    await asyncio.to_thread(write_cache_entry, key, body, etag)
+
+
+def _connect_cache_db() -> Optional[sqlite3.Connection]:
+    """Open the cache database, or return None if it is unavailable; the caller must hold _cache_db_lock."""
+    global _cache_db, _cache_disabled
+    if _cache_db is None and not _cache_disabled:
+        db = None
+        try:
+            db = sqlite3.connect(get_cache_directory() / "cache.db", timeout=30, check_same_thread=False)
+            # WAL lets parallel runs read while another one writes
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS kv (k TEXT PRIMARY KEY, etag TEXT, body TEXT, ts REAL)")
+        except (OSError, sqlite3.Error):
+            if db is not None:
+                db.close()
+            _cache_disabled = True
+            return None
+        _cache_db = db
+    return _cache_db
+
+
+def read_cache_entry(key: str) -> Optional[CacheEntry]:
+    """Read a cache entry, treating a missing or unreadable one as absent (blocking)."""
+    with _cache_db_lock:
+        db = _connect_cache_db()
+        if db is None:
+            return None
+        try:
+            row = db.execute(
+                "SELECT etag, body, ts FROM kv WHERE k = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+    if row is None:
+        return None
+    try:
+        return CacheEntry(row[0], json.loads(row[1]), row[2])
+    except ValueError:
+        return None
+
+
+def write_cache_entry(key: str, body: Any, etag: Optional[str] = None) -> None:
+    """Write a cache entry (blocking); the cache is best-effort, so failures are ignored."""
+    data = json.dumps(body)
+    with _cache_db_lock:
+        db = _connect_cache_db()
+        if db is None:
+            return
+        try:
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO kv (k, etag, body, ts) VALUES (?, ?, ?, ?)",
+                    (key, etag, data, time.time())
+                )
+        except sqlite3.Error:
+            pass
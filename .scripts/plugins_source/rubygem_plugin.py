@@ -4,20 +4,107 @@ RubyGems source plugin for version control.
 This plugin handles RubyGems repositories and gem downloads.
 """
 
+import asyncio
 import re
+import time
+import aiohttp
 import requests
-from typing import List, Optional
-import sys
-from pathlib import Path
+from typing import Any, List, Optional, Set
+from urllib.parse import urlsplit
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from plugins_source import SourcePlugin, VersionInfo
+from . import DEFAULT_VERSION_PATTERNS, SourcePlugin, VersionInfo, version_matcher
+from .http_client import (
+    RETRY_ATTEMPTS, RETRY_STATUSES, client_session, fetch_json, parse_json,
+    read_cache_entry, retry_delay, write_cache_entry,
+)
+
+
+def strip_version_suffix(filename: str) -> str:
+    """
+    Remove the version from a gem file name ('gem-name-1.2.3' -> 'gem-name').
+
+    Everything from the first '-' followed by a digit is dropped, using plain
+    string scans since gem names rarely contain more than a few dashes.
+    """
+    dash = filename.find('-')
+    while dash != -1:
+        if filename[dash + 1:dash + 2].isdecimal():
+            return filename[:dash]
+        dash = filename.find('-', dash + 1)
+    return filename
+
+
+# Characters RubyGems allows in a gem name; anything else (an empty name,
+# a path, a template placeholder) cannot exist and is not worth a request
+GEM_NAME_PATTERN = re.compile(r'[A-Za-z0-9._-]+')
+
+# Gems the API reported missing during this process
+_missing_gems: Set[str] = set()
+
+
+# Session for the synchronous helpers, created on first use so that plain
+# version checks (which use aiohttp) never build one
+_requests_session: Optional[requests.Session] = None
+
+
+def requests_session() -> requests.Session:
+    """Return the keep-alive session shared by the synchronous API helpers."""
+    global _requests_session
+    if _requests_session is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=32)
+        session.mount("https://", adapter)
+        session.headers.update({"Accept": "application/json", "User-Agent": "meso-forge"})
+        _requests_session = session
+    return _requests_session
+
+
+def get_json(api_url: str) -> Optional[Any]:
+    """
+    GET a JSON document with the synchronous session (blocking).
+
+    Uses the same persistent cache entries as fetch_json, revalidated with
+    If-None-Match / If-Modified-Since, so an unchanged document comes back as
+    a bodiless 304. Transient failures are retried as in fetch_json. Returns
+    None for any status other than 200 or 304.
+    """
+    key = f"json:{api_url}"
+    cached = read_cache_entry(key)
+    headers = {}
+    if cached:
+        if cached.etag:
+            headers['If-None-Match'] = cached.etag
+        if cached.body.get('last_modified'):
+            headers['If-Modified-Since'] = cached.body['last_modified']
+
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        try:
+            response = requests_session().get(api_url, headers=headers, timeout=30)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == RETRY_ATTEMPTS:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == RETRY_ATTEMPTS:
+                break
+        time.sleep(retry_delay(attempt))
+
+    if response.status_code == 304 and cached:
+        return cached.body['body']
+    if response.status_code != 200:
+        return None
+    body = parse_json(response.content)
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if etag or last_modified:
+        write_cache_entry(key, {'body': body, 'last_modified': last_modified}, etag)
+    return body
 
 
 class RubyGemsPlugin(SourcePlugin):
     """Plugin for handling RubyGems repositories."""
 
+    url_pattern = re.compile(r".*?https://(?:rubygems\.org|gem\.fury\.io)")
+
     @property
     def name(self) -> str:
         return "rubygems"
@@ -31,20 +118,23 @@ class RubyGemsPlugin(SourcePlugin):
 
     def can_handle(self, source_url: str) -> bool:
         """Check if this plugin can handle the given URL."""
-        return any(scheme in source_url for scheme in self.supported_schemes)
+        return self.url_pattern.match(source_url) is not None
 
     def extract_source_info(self, source_url: str) -> dict:
         """Extract gem name from RubyGems URL."""
         try:
             if 'rubygems.org' in source_url:
-                if '/gems/' in source_url:
+                # Parse the path once; segments[:-1] skips a trailing
+                # 'gems' or 'downloads' with nothing after it
+                segments = urlsplit(source_url).path.split('/')
+                if 'gems' in segments[:-1]:
                     # Extract from URL like https://rubygems.org/gems/gem-name
-                    gem_name = source_url.split('/gems/')[1].split('/')[0]
+                    gem_name = segments[segments.index('gems') + 1]
                     return {'gem_name': gem_name}
-                elif '/downloads/' in source_url:
+                elif 'downloads' in segments[:-1]:
                     # Extract from download URL like https://rubygems.org/downloads/gem-name-1.0.0.gem
                     # or template URL like https://rubygems.org/downloads/gem-name-${{ version }}.gem
-                    filename = source_url.split('/downloads/')[1].split('/')[0]
+                    filename = segments[segments.index('downloads') + 1]
                     if filename.endswith('.gem'):
                         filename = filename[:-4]
 
@@ -54,17 +144,14 @@ class RubyGemsPlugin(SourcePlugin):
                     elif '{{ version }}' in filename:
                         gem_name = filename.replace('-{{ version }}', '')
                     else:
-                        # Try to extract gem name by removing version-like suffix
-                        import re
                         # Remove version pattern from end (e.g., gem-name-1.2.3 -> gem-name)
-                        gem_name = re.sub(r'-\d+(\.\d+)*.*$', '', filename)
+                        gem_name = strip_version_suffix(filename)
 
                     return {'gem_name': gem_name}
                 else:
                     # Fallback - extract from URL path
-                    path_parts = source_url.split('/')
-                    if len(path_parts) > 1:
-                        gem_name = path_parts[-1]
+                    if len(segments) > 1:
+                        gem_name = segments[-1]
                         if gem_name.endswith('.gem'):
                             gem_name = gem_name[:-4]
                         return {'gem_name': gem_name}
@@ -88,26 +175,38 @@ class RubyGemsPlugin(SourcePlugin):
         source_info = self.extract_source_info(source_url)
         gem_name = source_info.get('gem_name', package_name)
 
-        return self._get_latest_gem_version(gem_name, package_name, version_patterns, quiet)
+        async with client_session(kwargs.get('session')) as session:
+            return await self._get_latest_gem_version(session, gem_name, package_name, version_patterns, quiet)
 
-    def _get_latest_gem_version(
+    async def _get_latest_gem_version(
         self,
+        session: aiohttp.ClientSession,
         gem_name: str,
         package_name: str,
         version_patterns: Optional[List[str]] = None,
         quiet: bool = False
     ) -> Optional[VersionInfo]:
         """Get latest gem version from RubyGems API."""
+        if not GEM_NAME_PATTERN.fullmatch(gem_name):
+            if not quiet:
+                print(f"({package_name}) Invalid gem name: {gem_name!r}")
+            return None
+        if gem_name in _missing_gems:
+            if not quiet:
+                print(f"({package_name}) Gem {gem_name} not found on RubyGems")
+            return None
+
         api_url = f"https://rubygems.org/api/v1/gems/{gem_name}.json"
 
         # Default version pattern if none provided
         if not version_patterns:
-            version_patterns = [r'^(\d+\.\d+\.\d+)']
+            version_patterns = DEFAULT_VERSION_PATTERNS
 
         try:
-            response = requests.get(api_url, timeout=30)
-            if response.status_code == 200:
-                gem_info = response.json()
+            # Conditional request backed by the persistent response cache
+            status, gem_info = await fetch_json(session, api_url)
+
+            if status == 200:
                 latest_version = gem_info.get('version')
 
                 if not latest_version:
@@ -115,45 +214,38 @@ class RubyGemsPlugin(SourcePlugin):
                         print(f"({package_name}) No version found for gem {gem_name}")
                     return None
 
-                # Check if version matches any of the patterns
-                for pattern in version_patterns:
-                    try:
-                        match = re.match(pattern, latest_version)
-                        if match:
-                            # Extract the version (first capture group or full match)
-                            version = match.group(1) if match.groups() else match.group(0)
-
-                            # Construct download URL for the gem
-                            download_url = f"https://rubygems.org/downloads/{gem_name}-{latest_version}.gem"
-
-                            if not quiet:
-                                print(f"({package_name}) Found gem version: {version}")
-                                print(f"({package_name}) Download URL: {download_url}")
-
-                            return VersionInfo(
-                                version=version,
-                                download_url=download_url,
-                                tag_name=latest_version,
-                                source_type="rubygems"
-                            )
-                    except re.error as e:
-                        if not quiet:
-                            print(f"({package_name}) Invalid regex pattern '{pattern}': {e}")
-                        continue
+                # Check if version matches any of the patterns; invalid
+                # patterns are reported once while building the matcher
+                version = version_matcher(version_patterns, package_name, quiet)(latest_version)
+                if version is not None:
+                    # Construct download URL for the gem
+                    download_url = f"https://rubygems.org/downloads/{gem_name}-{latest_version}.gem"
+
+                    if not quiet:
+                        print(f"({package_name}) Found gem version: {version}")
+                        print(f"({package_name}) Download URL: {download_url}")
+
+                    return VersionInfo(
+                        version=version,
+                        download_url=download_url,
+                        tag_name=latest_version,
+                        source_type="rubygems"
+                    )
 
                 if not quiet:
                     print(f"({package_name}) Gem version {latest_version} doesn't match patterns: {version_patterns}")
 
-            elif response.status_code == 404:
+            elif status == 404:
+                _missing_gems.add(gem_name)
                 if not quiet:
                     print(f"({package_name}) Gem {gem_name} not found on RubyGems")
             else:
                 if not quiet:
-                    print(f"({package_name}) Could not fetch gem info: {response.status_code}")
-        except requests.exceptions.Timeout:
+                    print(f"({package_name}) Could not fetch gem info: {status}")
+        except asyncio.TimeoutError:
             if not quiet:
                 print(f"({package_name}) Timeout fetching RubyGems info")
-        except requests.exceptions.ConnectionError:
+        except aiohttp.ClientConnectionError:
             if not quiet:
                 print(f"({package_name}) Connection error fetching RubyGems info")
         except Exception as e:
@@ -170,9 +262,8 @@ class RubyGemsPlugin(SourcePlugin):
             else:
                 api_url = f"https://rubygems.org/api/v1/gems/{gem_name}.json"
 
-            response = requests.get(api_url, timeout=30)
-            if response.status_code == 200:
-                gem_info = response.json()
+            gem_info = get_json(api_url)
+            if gem_info is not None:
                 return gem_info.get('dependencies', {})
         except Exception:
             pass
@@ -182,9 +273,10 @@ class RubyGemsPlugin(SourcePlugin):
         """Search for gems (useful for future enhancement)."""
         try:
             api_url = f"https://rubygems.org/api/v1/search.json?query={query}&limit={limit}"
-            response = requests.get(api_url, timeout=30)
-            if response.status_code == 200:
-                return response.json()
+            results = get_json(api_url)
+            if results is not None:
+                # The API pages results 30 at a time whatever the limit
+                return results[:limit]
         except Exception:
             pass
         return []
@@ -1,30 +1,29 @@
 import requests
 
+# One session, so every hop of the redirect lookup shares a keep-alive
+# connection
+session = requests.Session()
+
 owner = "sharkdp"
 repo = "fd"
 tag = "v10.2.0"
 
-release_api_url = f"https://api.github.com/repos/{owner}/{repo}/releases"
-response = requests.get(release_api_url)
-releases = response.json()
-
-tarball_url = None
-for release in releases:
-    if release.get("tag_name") == tag:
-        tarball_url = release.get("tarball_url")
-        break
+# The API tarball URL is a fixed template for a tag, so there is no need to
+# list the releases to find it; a missing tag shows up as a 404 below
+tarball_url = f"https://api.github.com/repos/{owner}/{repo}/tarball/{tag}"
+print(f"API tarball_url: {tarball_url}")
 
-if tarball_url:
-    print(f"API tarball_url: {tarball_url}")
-    # Make a request to the tarball_url, allow redirects
-    download_response = requests.get(tarball_url, allow_redirects=True)
+# Follow the redirects with a HEAD request; only the final URL is
+# needed, so there is no reason to download the tarball itself
+download_response = session.head(tarball_url, allow_redirects=True)
 
+if download_response.ok:
     # The final URL after redirects is in download_response.url
     actual_download_url = download_response.url
     print(f"Actual download URL (after redirect): {actual_download_url}")
 
-    # You can then save the content if needed
-    # with open(f"{repo}-{tag}.tar.gz", "wb") as f:
-    #     f.write(download_response.content)
+    # You can then download the content if needed
+    # with session.get(actual_download_url, stream=True) as r, open(f"{repo}-{tag}.tar.gz", "wb") as f:
+    #     shutil.copyfileobj(r.raw, f)
 else:
     print(f"Release with tag '{tag}' not found.")
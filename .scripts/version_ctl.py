@@ -8,36 +8,71 @@ template substitution whenever possible, making updates more reliable.
 
 import argparse
 import asyncio
+import contextlib
 import hashlib
 import json
 import os
 import re
 import sys
+import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union, Any, NamedTuple
-import requests
+from typing import Dict, List, Optional, Set, TextIO, Tuple, Union, Any, NamedTuple
+import aiohttp
+import semver
 try:
-    from ruamel.yaml import YAML
-    from ruamel.yaml.error import YAMLError
-    HAS_RUAMEL_YAML = True
-
-    # Configure ruamel.yaml for consistent formatting
-    yaml_processor = YAML()
-    yaml_processor.preserve_quotes = True
-    yaml_processor.width = 4096  # Prevent line wrapping
-    yaml_processor.indent(mapping=2, sequence=4, offset=2)
-    yaml_processor.default_flow_style = False
-    yaml_processor.allow_unicode = True
-    yaml_processor.encoding = 'utf-8'
+    import orjson
+    HAS_ORJSON = True
 except ImportError:
-    import yaml
-    from yaml import YAMLError
-    HAS_RUAMEL_YAML = False
-    yaml_processor = None
-import semver
+    HAS_ORJSON = False
+
+from yaml_utils import (
+    YAML_ERRORS, dump_yaml, extract_name_version, load_yaml, load_yaml_fast, patch_yaml_file
+)
 
 # Import plugin system
-from plugins_source import PluginManager, VersionInfo
+from plugins_source import VersionInfo, plugin_manager, url_host
+from plugins_source.http_client import (
+    API_TIMEOUT, DOWNLOAD_TIMEOUT, cache_get, cache_put, create_session, fetch_json, read_cache_entry,
+    write_cache_entry
+)
+
+
+# Upper bound on recipes processed at once; keeps GitHub API bursts polite.
+# Override with the MESO_CONCURRENCY environment variable.
+MAX_CONCURRENT_RECIPES = max(1, int(os.environ.get('MESO_CONCURRENCY', '16')))
+
+# Tarball downloads are large, so hash fewer of them at a time
+download_semaphore = asyncio.Semaphore(4)
+
+# Read size for streaming downloads into the hash, and the amount buffered
+# before each hash update is handed to a worker thread
+HASH_CHUNK_SIZE = 1 << 20
+
+# Channel subdirectories covered by the bulk conda-forge index
+CONDA_FORGE_SUBDIRS = ('noarch', 'linux-64')
+
+# From this many recipes on, one repodata download per subdirectory is
+# cheaper than an anaconda.org API request per package
+CONDA_FORGE_INDEX_THRESHOLD = 50
+
+# Seconds a downloaded conda-forge index is used without asking the server
+CONDA_FORGE_INDEX_TTL = 3600
+
+# Versions of every conda-forge package, {name: {version, ...}}, once loaded
+_conda_forge_index: Optional[Dict[str, Set[str]]] = None
+
+# Cache entry holding {recipe path: [mtime_ns, size, name, version]}
+RECIPE_LISTING_CACHE_KEY = "recipe-listing"
+
+# Map structured extra.version mode names to internal API mode names
+VERSION_MODE_MAPPING = {
+    'github-release': 'github-release',
+    'github-tags': 'github-tags',
+    'rubygems-api': 'rubygems',
+    'pypi-api': 'pypi',
+    'npm-api': 'npm'
+}
 
 
 class UpdateStats:
@@ -58,6 +93,20 @@ class UpdateStats:
         """Add an error for a package."""
         self.errors.append((package_name, error_message))
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the counters and errors as JSON-serialisable data."""
+        return {
+            'total_packages': self.total_packages,
+            'packages_updated': self.packages_updated,
+            'packages_up_to_date': self.packages_up_to_date,
+            'packages_on_conda_forge': self.packages_on_conda_forge,
+            'packages_not_on_conda_forge': self.packages_not_on_conda_forge,
+            'conda_forge_newer': self.conda_forge_newer,
+            'upstream_newer': self.upstream_newer,
+            'unsupported_sources': self.unsupported_sources,
+            'errors': [{'package': pkg, 'error': error} for pkg, error in self.errors],
+        }
+
     def print_summary(self):
         """Print a formatted summary of the update statistics."""
         print("\n" + "="*80)
@@ -88,33 +137,35 @@ class UpdateStats:
                 for pkg, error in self.errors:
                     print(f"     • {pkg}: {error}")
 
-            success_rate = (self.packages_updated + self.packages_up_to_date) / self.total_packages * 100
-            print(f"\n📊 Success rate: {success_rate:.1f}% ({self.packages_updated + self.packages_up_to_date}/{self.total_packages})")
+            succeeded = self.packages_updated + self.packages_up_to_date
+            success_rate = succeeded / self.total_packages * 100
+            print(f"\n📊 Success rate: {success_rate:.1f}% ({succeeded}/{self.total_packages})")
 
-            if self.packages_updated == 0 and len(self.errors) == 0 and self.packages_up_to_date > 0:
+            if self.packages_updated == 0 and not self.errors and self.packages_up_to_date > 0:
                 print("\n✅ All packages are already up-to-date!")
 
         print("="*80)
 
 
-def get_cache_directory() -> Path:
-    """Get cache directory for temporary files."""
-    cache_dir = Path.home() / ".cache" / "meso-forge-version-ctl"
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    return cache_dir
+def is_github_api_tarball(url: str) -> bool:
+    """Check whether a URL is a GitHub API tarball link that redirects to codeload."""
+    return url_host(url) == 'api.github.com' and '/tarball/' in url
 
 
-def resolve_tarball_url(url: str) -> str:
+async def resolve_tarball_url(session: aiohttp.ClientSession, url: str) -> str:
     """Resolve GitHub tarball URL to actual download path using redirects."""
     # Only resolve GitHub URLs to follow redirects to final CDN URLs
-    if 'github.com' not in url and 'codeload.github.com' not in url:
+    host = url_host(url)
+    if host != 'github.com' and not host.endswith('.github.com'):
         return url
 
     try:
         # Make a HEAD request to follow redirects and get the final URL
-        response = requests.head(url, allow_redirects=True, timeout=30)
+        async with session.head(url, allow_redirects=True, timeout=API_TIMEOUT) as response:
+            status = response.status
+            final_url = str(response.url)
 
-        if response.status_code == 200:
+        if status == 200:
             # GitHub API tarball URLs redirect to codeload.github.com URLs, but sometimes
             # they redirect to "/legacy.tar.gz/" URLs which can return incorrect content
             # for monorepos with multiple applications (like bitwarden/clients).
@@ -128,15 +179,15 @@ def resolve_tarball_url(url: str) -> str:
             # The legacy URL appears to resolve to the latest commit on main branch rather
             # than the specific tagged release, which is problematic for monorepos where
             # different applications have different release cycles.
-            resolved_url = response.url
+            resolved_url = final_url
             if 'codeload.github.com' in resolved_url and '/legacy.tar.gz/' in resolved_url:
                 resolved_url = resolved_url.replace('/legacy.tar.gz/', '/tar.gz/')
             return resolved_url
         else:
-            print(f"Warning: HTTP {response.status_code} when resolving {url}")
+            print(f"Warning: HTTP {status} when resolving {url}")
             return url
 
-    except requests.exceptions.RequestException as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         print(f"Error resolving tarball URL {url}: {e}")
         return url  # Return original URL as fallback
     except Exception as e:
@@ -144,49 +195,194 @@ def resolve_tarball_url(url: str) -> str:
         return url
 
 
-def calculate_sha256(url: str) -> Optional[str]:
+async def calculate_sha256(session: aiohttp.ClientSession, url: str) -> Optional[str]:
     """Calculate SHA256 hash of a file from URL."""
     try:
+        # Revalidate a previously hashed artifact in the same request that
+        # would download it; an unchanged artifact comes back as a bodiless 304.
+        # Entries hold {'sha256': ..., 'last_modified': ...} plus the ETag.
+        cache_key = f"sha256:{url}"
+        entry = await cache_get(cache_key)
+        headers = {}
+        if entry:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.body.get('last_modified'):
+                headers['If-Modified-Since'] = entry.body['last_modified']
+
         # Always use the URL as-is since resolve_tarball_url is now called
         # earlier in the process when URLs are first obtained
-        response = requests.get(url, stream=True, timeout=30)
-        if response.status_code == 200:
-            sha256_hash = hashlib.sha256()
-            for chunk in response.iter_content(chunk_size=8192):
-                sha256_hash.update(chunk)
-            return sha256_hash.hexdigest()
-        else:
-            print(f"HTTP {response.status_code} when downloading {url}")
-            return None
+        async with download_semaphore, session.get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT) as response:
+            if response.status == 304 and entry:
+                return entry.body['sha256']
+            if response.status == 200:
+                sha256_hash = hashlib.sha256()
+                # Hash in a worker thread (hashlib releases the GIL on large
+                # buffers) so the event loop keeps servicing other downloads
+                buffer = bytearray()
+                async for chunk in response.content.iter_chunked(HASH_CHUNK_SIZE):
+                    buffer += chunk
+                    if len(buffer) >= HASH_CHUNK_SIZE:
+                        data, buffer = buffer, bytearray()
+                        await asyncio.to_thread(sha256_hash.update, data)
+                sha256_hash.update(buffer)
+                digest = sha256_hash.hexdigest()
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+            else:
+                print(f"HTTP {response.status} when downloading {url}")
+                return None
+
+        if etag or last_modified:
+            await cache_put(cache_key, {'sha256': digest, 'last_modified': last_modified}, etag)
+        return digest
     except Exception as e:
         print(f"Error downloading {url}: {e}")
         return None
 
 
+# Plain X.Y.Z versions, which can be compared without semver
+SIMPLE_VERSION_PATTERN = re.compile(r'^(\d+)\.(\d+)\.(\d+)$')
+
+
+@lru_cache(maxsize=4096)
+def parse_version(version: str) -> semver.VersionInfo:
+    """Parse a semantic version, reusing earlier parses of the same string."""
+    return semver.VersionInfo.parse(version)
+
+
+def compare_versions(version: str, other: str) -> int:
+    """
+    Compare two semantic versions, returning -1, 0 or 1.
+
+    Plain X.Y.Z versions are compared as integer tuples; semver is only used
+    for pre-release or build metadata and raises ValueError on invalid input.
+    """
+    match = SIMPLE_VERSION_PATTERN.match(version)
+    other_match = SIMPLE_VERSION_PATTERN.match(other)
+    if match and other_match:
+        key = tuple(map(int, match.groups()))
+        other_key = tuple(map(int, other_match.groups()))
+        return (key > other_key) - (key < other_key)
+    return parse_version(version).compare(parse_version(other))
+
+
+def dump_json(data: Any) -> str:
+    """Serialize command output as indented JSON, using orjson when available."""
+    if HAS_ORJSON:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(data, indent=2)
+
+
 def update_yaml_version(recipe_data: dict, new_version: str) -> None:
     """Update version in recipe YAML data structure."""
     if 'context' in recipe_data and 'version' in recipe_data['context']:
         recipe_data['context']['version'] = new_version
 
 
-async def get_conda_forge_versions(package_name: str, quiet: bool = False) -> Dict[str, Any]:
+def index_repodata(body: bytes) -> Dict[str, List[str]]:
+    """Reduce a repodata.json document to the versions of each package."""
+    # Repodata runs to hundreds of MB, where orjson parses several times faster
+    data = orjson.loads(body) if HAS_ORJSON else json.loads(body)
+    versions: Dict[str, Set[str]] = {}
+    for key in ('packages', 'packages.conda'):
+        for record in data.get(key, {}).values():
+            versions.setdefault(record['name'], set()).add(record['version'])
+    return {name: sorted(found) for name, found in versions.items()}
+
+
+async def load_conda_forge_subdir(session: aiohttp.ClientSession, subdir: str) -> Optional[Dict[str, List[str]]]:
+    """Get the package versions of one conda-forge subdirectory."""
+    url = f"https://conda.anaconda.org/conda-forge/{subdir}/repodata.json"
+
+    # Only the reduced index is cached; repodata itself is hundreds of MB
+    cache_key = f"conda-forge:{subdir}"
+    cached = await cache_get(cache_key)
+
+    # Repodata changes with nearly every conda-forge upload, so a recent
+    # index is reused as-is rather than revalidated into a full download
+    if cached and time.time() - cached.timestamp < CONDA_FORGE_INDEX_TTL:
+        return cached.body
+
+    headers = {'If-None-Match': cached.etag} if cached and cached.etag else {}
+    async with download_semaphore, session.get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT) as response:
+        if response.status == 304 and cached:
+            await cache_put(cache_key, cached.body, cached.etag)
+            return cached.body
+        if response.status != 200:
+            return None
+        body = await response.read()
+        etag = response.headers.get('ETag')
+
+    versions = await asyncio.to_thread(index_repodata, body)
+    await cache_put(cache_key, versions, etag)
+    return versions
+
+
+async def load_conda_forge_index(session: aiohttp.ClientSession,
+                                 quiet: bool = False) -> Optional[Dict[str, Set[str]]]:
+    """
+    Load the versions of every conda-forge package from the channel repodata.
+
+    Once loaded, get_conda_forge_versions answers from the index instead of
+    querying anaconda.org per package; packages not in CONDA_FORGE_SUBDIRS,
+    such as ones built only for osx-* or win-*, are still looked up through
+    the API. On failure the index stays unset and lookups keep using the API.
+    """
+    global _conda_forge_index
+
+    if not quiet:
+        print(f"📚 Loading conda-forge package index ({', '.join(CONDA_FORGE_SUBDIRS)})...")
+    try:
+        subdirs = await asyncio.gather(
+            *(load_conda_forge_subdir(session, subdir) for subdir in CONDA_FORGE_SUBDIRS)
+        )
+    except Exception as e:
+        if not quiet:
+            print(f"Could not load conda-forge index, checking packages individually: {e}")
+        return None
+
+    if any(versions is None for versions in subdirs):
+        if not quiet:
+            print("Could not load conda-forge index, checking packages individually")
+        return None
+
+    index: Dict[str, Set[str]] = {}
+    for versions in subdirs:
+        for name, found in versions.items():
+            index.setdefault(name, set()).update(found)
+    _conda_forge_index = index
+    return index
+
+
+async def get_conda_forge_versions(session: aiohttp.ClientSession, package_name: str,
+                                   quiet: bool = False) -> Dict[str, Any]:
     """Get conda-forge package information."""
+    # The index only covers CONDA_FORGE_SUBDIRS; a package missing from it
+    # may still be published for other platforms, so the API is asked
+    if _conda_forge_index is not None and package_name in _conda_forge_index:
+        unique_versions = sorted(_conda_forge_index[package_name], reverse=True)
+        return {
+            'exists': True,
+            'versions': unique_versions,
+            'latest': unique_versions[0]
+        }
+
     url = f"https://api.anaconda.org/package/conda-forge/{package_name}"
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=30) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    versions = [file['version'] for file in data.get('files', [])]
-                    unique_versions = sorted(set(versions), key=lambda x: x, reverse=True)
-                    return {
-                        'exists': True,
-                        'versions': unique_versions,
-                        'latest': unique_versions[0] if unique_versions else None
-                    }
-                else:
-                    return {'exists': False, 'versions': [], 'latest': None}
+        # Revalidated against the cached copy, so unchanged packages cost a 304
+        status, data = await fetch_json(session, url)
+        if status == 200:
+            versions = [file['version'] for file in data.get('files', [])]
+            unique_versions = sorted(set(versions), key=lambda x: x, reverse=True)
+            return {
+                'exists': True,
+                'versions': unique_versions,
+                'latest': unique_versions[0] if unique_versions else None
+            }
+        else:
+            return {'exists': False, 'versions': [], 'latest': None}
     except Exception as e:
         if not quiet:
             print(f"({package_name}) Error checking conda-forge: {e}")
@@ -196,9 +392,10 @@ async def get_conda_forge_versions(package_name: str, quiet: bool = False) -> Di
 
 
 
-async def check_package_on_conda_forge(package_name: str, current_version: str) -> Dict[str, Any]:
+async def check_package_on_conda_forge(session: aiohttp.ClientSession, package_name: str,
+                                       current_version: str) -> Dict[str, Any]:
     """Check if package exists on conda-forge and get version info."""
-    conda_info = await get_conda_forge_versions(package_name, quiet=True)
+    conda_info = await get_conda_forge_versions(session, package_name, quiet=True)
 
     result = {
         'exists_on_conda_forge': conda_info['exists'],
@@ -210,16 +407,13 @@ async def check_package_on_conda_forge(package_name: str, current_version: str)
     return result
 
 
-async def get_upstream_latest_version(source_url: str, package_name: str,
+async def get_upstream_latest_version(session: aiohttp.ClientSession, source_url: str, package_name: str,
                                       version_patterns: Optional[List[str]] = None,
                                       mode: Optional[str] = None,
                                       mode_explicit: bool = False,
                                       quiet: bool = False) -> Optional[VersionInfo]:
     """Get the latest version info from upstream source using plugin system."""
-    # Initialize plugin manager
-    plugin_manager = PluginManager()
-
-    # Get appropriate plugin for the URL
+    # Get appropriate plugin for the URL from the shared, already-loaded manager
     plugin = plugin_manager.get_plugin_for_url(source_url)
     if not plugin:
         if not quiet:
@@ -236,7 +430,8 @@ async def get_upstream_latest_version(source_url: str, package_name: str,
             package_name=package_name,
             version_patterns=version_patterns,
             mode=mode,
-            quiet=quiet
+            quiet=quiet,
+            session=session
         )
     except Exception as e:
         if not quiet:
@@ -244,7 +439,7 @@ async def get_upstream_latest_version(source_url: str, package_name: str,
         return None
 
 
-async def update_recipe_source(recipe_path: Path, recipe: Dict[str, Any],
+async def update_recipe_source(session: aiohttp.ClientSession, recipe_path: Path, recipe: Dict[str, Any],
                               current_version: str, package_name: str,
                               source: Dict[str, Any], stats: UpdateStats,
                               dry_run: bool = False, quiet: bool = False, force: bool = False) -> bool:
@@ -263,34 +458,6 @@ async def update_recipe_source(recipe_path: Path, recipe: Dict[str, Any],
         stats.unsupported_sources += 1
         return False
 
-    # Check conda-forge first
-    if not quiet:
-        print(f"({package_name}) Checking conda-forge availability...")
-    conda_info = await check_package_on_conda_forge(package_name, current_version)
-
-    if conda_info['exists_on_conda_forge']:
-        stats.packages_on_conda_forge += 1
-        if not quiet:
-            print(f"({package_name}) Package exists on conda-forge with {len(conda_info['conda_forge_versions'])} versions")
-            print(f"({package_name}) Latest on conda-forge: {conda_info['latest_conda_forge_version']}")
-
-            if conda_info['current_version_on_conda_forge']:
-                print(f"({package_name}) Current version {current_version} is available on conda-forge")
-            else:
-                print(f"({package_name}) Current version {current_version} is NOT available on conda-forge")
-
-        # Check if conda-forge has a newer version
-        try:
-            latest_conda = conda_info['latest_conda_forge_version']
-            if latest_conda and semver.compare(latest_conda, current_version) > 0:
-                stats.conda_forge_newer += 1
-        except:
-            pass
-    else:
-        stats.packages_not_on_conda_forge += 1
-        if not quiet:
-            print(f"({package_name}) Package not found on conda-forge")
-
     # Get upstream latest version info (including download URL)
     source_url = source.get('url') or source.get('git', '')
     if not source_url:
@@ -309,15 +476,7 @@ async def update_recipe_source(recipe_path: Path, recipe: Dict[str, Any],
             if isinstance(version_config, dict):
                 for mode_key, patterns in version_config.items():
                     if patterns:  # Use the first non-empty mode found
-                        # Map structured mode names to internal API mode names
-                        mode_mapping = {
-                            'github-release': 'github-release',
-                            'github-tags': 'github-tags',
-                            'rubygems-api': 'rubygems',
-                            'pypi-api': 'pypi',
-                            'npm-api': 'npm'
-                        }
-                        mode = mode_mapping.get(mode_key, mode_key)
+                        mode = VERSION_MODE_MAPPING.get(mode_key, mode_key)
                         version_patterns = patterns if isinstance(patterns, list) else [patterns]
                         mode_explicit = True
                         break
@@ -338,9 +497,37 @@ async def update_recipe_source(recipe_path: Path, recipe: Dict[str, Any],
                 if not quiet:
                     print(f"({package_name}) Using mode: {mode}")
 
+    # conda-forge and the upstream source live on different hosts, so
+    # overlap the two lookups instead of paying for both round-trips in turn
     if not quiet:
-        print(f"({package_name}) Checking upstream for latest version...")
-    upstream_info = await get_upstream_latest_version(source_url, package_name, version_patterns, mode, mode_explicit, quiet)
+        print(f"({package_name}) Checking conda-forge availability and upstream for latest version...")
+    conda_info, upstream_info = await asyncio.gather(
+        check_package_on_conda_forge(session, package_name, current_version),
+        get_upstream_latest_version(session, source_url, package_name, version_patterns, mode, mode_explicit, quiet)
+    )
+
+    if conda_info['exists_on_conda_forge']:
+        stats.packages_on_conda_forge += 1
+        if not quiet:
+            print(f"({package_name}) Package exists on conda-forge with {len(conda_info['conda_forge_versions'])} versions")
+            print(f"({package_name}) Latest on conda-forge: {conda_info['latest_conda_forge_version']}")
+
+            if conda_info['current_version_on_conda_forge']:
+                print(f"({package_name}) Current version {current_version} is available on conda-forge")
+            else:
+                print(f"({package_name}) Current version {current_version} is NOT available on conda-forge")
+
+        # Check if conda-forge has a newer version
+        try:
+            latest_conda = conda_info['latest_conda_forge_version']
+            if latest_conda and compare_versions(latest_conda, current_version) > 0:
+                stats.conda_forge_newer += 1
+        except:
+            pass
+    else:
+        stats.packages_not_on_conda_forge += 1
+        if not quiet:
+            print(f"({package_name}) Package not found on conda-forge")
 
     if not upstream_info:
         if not quiet:
@@ -365,7 +552,7 @@ async def update_recipe_source(recipe_path: Path, recipe: Dict[str, Any],
                 print(f"({package_name}) Forcing update even though versions match")
 
     try:
-        if semver.compare(current_version, upstream_version) >= 0:
+        if compare_versions(current_version, upstream_version) >= 0:
             if not force:
                 if not quiet:
                     print(f"({package_name}) Current version is newer than or equal to upstream")
@@ -410,7 +597,7 @@ async def update_recipe_source(recipe_path: Path, recipe: Dict[str, Any],
             if not quiet:
                 print(f"({package_name}) Using template substitution: {new_url}")
 
-        new_hash = calculate_sha256(new_url)
+        new_hash = await calculate_sha256(session, new_url)
 
         if not new_hash:
             if not quiet:
@@ -418,6 +605,11 @@ async def update_recipe_source(recipe_path: Path, recipe: Dict[str, Any],
             stats.add_error(package_name, "Failed to calculate SHA256 hash")
             return False
 
+        # Values as they are written in the file, for patching it in place
+        old_version = recipe.get('context', {}).get('version')
+        old_url = source.get('url') if isinstance(source, dict) else None
+        old_sha256 = source.get('sha256') if isinstance(source, dict) else None
+
         # Update the recipe YAML object
         update_yaml_version(recipe, upstream_version)
 
@@ -437,8 +629,8 @@ async def update_recipe_source(recipe_path: Path, recipe: Dict[str, Any],
                     if not quiet:
                         print(f"({package_name}) Template URL differs from API URL, using API URL")
                     # Resolve GitHub API URLs to actual download URLs for storage in recipe
-                    if 'api.github.com' in new_url and '/tarball/' in new_url:
-                        resolved_new_url = resolve_tarball_url(new_url)
+                    if is_github_api_tarball(new_url):
+                        resolved_new_url = await resolve_tarball_url(session, new_url)
                         if resolved_new_url != new_url:
                             if not quiet:
                                 print(f"({package_name}) Resolving API URL for recipe: {resolved_new_url}")
@@ -450,8 +642,8 @@ async def update_recipe_source(recipe_path: Path, recipe: Dict[str, Any],
             else:
                 # Not a template, use API URL
                 # Resolve GitHub API URLs to actual download URLs for storage in recipe
-                if 'api.github.com' in new_url and '/tarball/' in new_url:
-                    resolved_new_url = resolve_tarball_url(new_url)
+                if is_github_api_tarball(new_url):
+                    resolved_new_url = await resolve_tarball_url(session, new_url)
                     if resolved_new_url != new_url:
                         if not quiet:
                             print(f"({package_name}) Resolving API URL for recipe: {resolved_new_url}")
@@ -465,13 +657,16 @@ async def update_recipe_source(recipe_path: Path, recipe: Dict[str, Any],
         if isinstance(source, dict):
             source['sha256'] = new_hash
 
-        # Write the updated YAML back to file
-        if HAS_RUAMEL_YAML:
-            with open(recipe_path, 'w', encoding='utf-8') as f:
-                yaml_processor.dump(recipe, f)
-        else:
-            with open(recipe_path, 'w', encoding='utf-8') as f:
-                yaml.dump(recipe, f, default_flow_style=False, allow_unicode=True)
+        # Patch the changed scalars in place; only re-emit the whole document
+        # when a value cannot be located unambiguously
+        changes = [('sha256', old_sha256, new_hash)]
+        if old_version is not None:
+            changes.append(('version', old_version, upstream_version))
+        if isinstance(source, dict) and source.get('url') != old_url:
+            changes.append(('url', old_url, source['url']))
+        patched = await asyncio.to_thread(patch_yaml_file, recipe_path, changes)
+        if not patched:
+            await asyncio.to_thread(dump_yaml, recipe, recipe_path)
         if not quiet:
             print(f"({package_name}) Updated to version {upstream_version}")
             print(f"({package_name}) Updated URL to: {new_url}")
@@ -488,19 +683,14 @@ async def update_recipe_source(recipe_path: Path, recipe: Dict[str, Any],
     return False
 
 
-async def update_recipe(recipe_path: Path, stats: UpdateStats, dry_run: bool = False, quiet: bool = False, force: bool = False) -> None:
+async def update_recipe(session: aiohttp.ClientSession, recipe_path: Path, stats: UpdateStats,
+                        dry_run: bool = False, quiet: bool = False, force: bool = False) -> None:
     """Update version and hash in recipe file."""
     try:
-        if not recipe_path.exists():
-            print(f"Recipe file {recipe_path} does not exist")
-            return
-
-        if HAS_RUAMEL_YAML:
-            with open(recipe_path, 'r', encoding='utf-8') as f:
-                recipe = yaml_processor.load(f)
-        else:
-            with open(recipe_path, 'r', encoding='utf-8') as f:
-                recipe = yaml.safe_load(f)
+        # Only a recipe that may be written back needs the round-trip parser.
+        # A missing file surfaces as FileNotFoundError from the load below.
+        loader = load_yaml_fast if dry_run else load_yaml
+        recipe = await asyncio.to_thread(loader, recipe_path)
 
         if not recipe:
             print(f"Empty or invalid YAML in {recipe_path}")
@@ -535,7 +725,7 @@ async def update_recipe(recipe_path: Path, stats: UpdateStats, dry_run: bool = F
         sources = recipe['source']
 
         if isinstance(sources, dict):
-            await update_recipe_source(recipe_path, recipe, current_version, package_name, sources, stats, dry_run, quiet, force)
+            await update_recipe_source(session, recipe_path, recipe, current_version, package_name, sources, stats, dry_run, quiet, force)
         elif isinstance(sources, list):
             if not sources:
                 if not quiet:
@@ -547,7 +737,7 @@ async def update_recipe(recipe_path: Path, stats: UpdateStats, dry_run: bool = F
             if isinstance(first_source, dict):
                 if len(sources) > 1 and not quiet:
                     print(f"({package_name}) Multiple sources found, only checking version for first source")
-                await update_recipe_source(recipe_path, recipe, current_version, package_name, first_source, stats, dry_run, quiet, force)
+                await update_recipe_source(session, recipe_path, recipe, current_version, package_name, first_source, stats, dry_run, quiet, force)
             else:
                 if not quiet:
                     print(f"({package_name}) First source is not a dict: {type(first_source)}")
@@ -557,7 +747,7 @@ async def update_recipe(recipe_path: Path, stats: UpdateStats, dry_run: bool = F
                 print(f"({package_name}) Unsupported source format: {type(sources)}")
             stats.add_error(package_name, f"Unsupported source format: {type(sources)}")
 
-    except YAMLError as e:
+    except YAML_ERRORS as e:
         print(f"YAML parsing error in {recipe_path}: {e}")
         stats.add_error(recipe_path.name, f"YAML parsing error: {e}")
     except FileNotFoundError:
@@ -571,86 +761,159 @@ async def update_recipe(recipe_path: Path, stats: UpdateStats, dry_run: bool = F
         stats.add_error(recipe_path.name, f"Unexpected error: {e}")
 
 
+async def update_recipes(session: aiohttp.ClientSession, recipe_files: List[Path], stats: UpdateStats,
+                         dry_run: bool = False, quiet: bool = False, force: bool = False) -> None:
+    """Update all recipe files concurrently."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_RECIPES)
+
+    async def update_one(recipe_file: Path) -> None:
+        async with semaphore:
+            await update_recipe(session, recipe_file, stats, dry_run, quiet, force)
+
+    # update_recipe records per-recipe failures itself; anything escaping it is
+    # systemic, so the task group cancels the remaining work instead of waiting
+    async with asyncio.TaskGroup() as task_group:
+        for recipe_file in recipe_files:
+            task_group.create_task(update_one(recipe_file))
+
+
 def find_recipe_files(recipes_dir: Path) -> List[Path]:
     """Find all recipe.yaml files in the recipes directory."""
     recipe_files = []
-    if recipes_dir.exists() and recipes_dir.is_dir():
-        for item in recipes_dir.iterdir():
-            if item.is_dir():
-                recipe_file = item / "recipe.yaml"
-                if recipe_file.exists():
-                    recipe_files.append(recipe_file)
+    try:
+        entries = os.scandir(recipes_dir)
+    except (FileNotFoundError, NotADirectoryError):
+        return recipe_files
+
+    # DirEntry.is_dir() answers from the directory listing itself, so each
+    # package costs one stat (for recipe.yaml) instead of three
+    with entries:
+        for entry in entries:
+            if entry.is_dir():
+                recipe_file = os.path.join(entry.path, "recipe.yaml")
+                if os.path.exists(recipe_file):
+                    recipe_files.append(Path(recipe_file))
     return sorted(recipe_files)
 
 
+def select_recipe_files(recipes_dir: Path, package_names: Optional[List[str]] = None) -> List[Path]:
+    """Find recipe files, optionally restricted to the named packages."""
+    recipe_files = find_recipe_files(recipes_dir)
+    if not package_names:
+        return recipe_files
+
+    # Look requested packages up in the single directory scan above
+    # rather than probing the filesystem once per name
+    available = {recipe_file.parent.name: recipe_file for recipe_file in recipe_files}
+    for name in package_names:
+        if name not in available:
+            print(f"Package '{name}' not found")
+    return [available[name] for name in package_names if name in available]
+
+
+def read_recipe_listing(recipe_files: List[Path]) -> Dict[Path, Tuple[Optional[str], Optional[str]]]:
+    """Get (name, version) for each recipe, parsing only recipes changed since the last listing."""
+    cached = read_cache_entry(RECIPE_LISTING_CACHE_KEY)
+    listing = cached.body if cached and isinstance(cached.body, dict) else {}
+
+    result = {}
+    changed = False
+    for recipe_file in recipe_files:
+        try:
+            stat = recipe_file.stat()
+        except OSError:
+            result[recipe_file] = (None, None)
+            continue
+
+        key = str(recipe_file.resolve())
+        entry = listing.get(key)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            result[recipe_file] = (entry[2], entry[3])
+            continue
+
+        try:
+            name, version = extract_name_version(recipe_file)
+        except Exception:
+            name, version = None, None
+        listing[key] = [stat.st_mtime_ns, stat.st_size, name, version]
+        result[recipe_file] = (name, version)
+        changed = True
+
+    if changed:
+        write_cache_entry(RECIPE_LISTING_CACHE_KEY, listing)
+    return result
+
+
 def list_available_packages(recipes_dir: Path) -> None:
     """List all available packages and exit."""
     recipe_files = find_recipe_files(recipes_dir)
+    listing = read_recipe_listing(recipe_files)
 
     print("📦 Available packages:")
     for recipe_file in recipe_files:
         package_name = recipe_file.parent.name
-        try:
-            with open(recipe_file, 'r', encoding='utf-8') as f:
-                recipe = yaml.safe_load(f)
-            current_version = recipe.get('context', {}).get('version', 'unknown')
+        _, current_version = listing[recipe_file]
+        if current_version is not None:
             print(f"   • {package_name} (v{current_version})")
-        except Exception:
+        else:
             print(f"   • {package_name} (version unknown)")
 
     print(f"\n📊 Total: {len(recipe_files)} packages")
 
 
-async def check_conda_forge_status_only(recipes_dir: Path, package_names: Optional[List[str]] = None,
-                                       newer_only: bool = False, quiet: bool = False, json_output: bool = False) -> None:
-    """Check conda-forge status only, skip upstream checks."""
-    recipe_files = find_recipe_files(recipes_dir)
+async def check_conda_forge_status_only(session: aiohttp.ClientSession, recipes_dir: Path,
+                                       package_names: Optional[List[str]] = None,
+                                       newer_only: bool = False, quiet: bool = False,
+                                       json_output: Optional[TextIO] = None) -> None:
+    """
+    Check conda-forge status only, skip upstream checks.
 
-    if package_names:
-        # Filter to specific packages
-        filtered_files = []
-        for name in package_names:
-            recipe_file = recipes_dir / name / "recipe.yaml"
-            if recipe_file.exists():
-                filtered_files.append(recipe_file)
-            else:
-                print(f"Package '{name}' not found")
-        recipe_files = filtered_files
+    With json_output, the results are written to it as JSON instead of
+    printing the summary.
+    """
+    recipe_files = select_recipe_files(recipes_dir, package_names)
 
     if not recipe_files:
         print("No recipe files found to process")
         return
 
-    results = {}
-    stats = UpdateStats()
+    if len(recipe_files) >= CONDA_FORGE_INDEX_THRESHOLD:
+        await load_conda_forge_index(session, quiet)
 
-    for recipe_file in recipe_files:
-        try:
-            with open(recipe_file, 'r', encoding='utf-8') as f:
-                recipe = yaml.safe_load(f)
+    stats = UpdateStats()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_RECIPES)
 
-            package_name = recipe['package']['name']
-            current_version = recipe['context']['version']
+    async def check_one(recipe_file: Path) -> Optional[Tuple[str, Dict[str, Any]]]:
+        async with semaphore:
+            try:
+                # Only two scalars are needed, so skip building the recipe
+                package_name, current_version = await asyncio.to_thread(extract_name_version, recipe_file)
+                if package_name is None or current_version is None:
+                    raise ValueError("Missing package.name or context.version")
 
-            conda_info = await check_package_on_conda_forge(package_name, current_version)
+                conda_info = await check_package_on_conda_forge(session, package_name, current_version)
 
-            if conda_info['exists_on_conda_forge']:
-                stats.packages_on_conda_forge += 1
-            else:
-                stats.packages_not_on_conda_forge += 1
+                if conda_info['exists_on_conda_forge']:
+                    stats.packages_on_conda_forge += 1
+                else:
+                    stats.packages_not_on_conda_forge += 1
 
-            results[package_name] = {
-                'current_version': current_version,
-                'conda_forge': conda_info
-            }
+                stats.total_packages += 1
+                return package_name, {
+                    'current_version': current_version,
+                    'conda_forge': conda_info
+                }
 
-            stats.total_packages += 1
+            except Exception as e:
+                stats.add_error(recipe_file.name, str(e))
+                return None
 
-        except Exception as e:
-            stats.add_error(recipe_file.name, str(e))
+    # gather keeps the results in recipe order for the JSON output
+    checked = await asyncio.gather(*(check_one(recipe_file) for recipe_file in recipe_files))
+    results = dict(result for result in checked if result is not None)
 
-    if json_output:
-        print(json.dumps(results, indent=2))
+    if json_output is not None:
+        print(dump_json(results), file=json_output)
     else:
         stats.print_summary()
 
@@ -722,26 +985,32 @@ async def main() -> int:
         list_available_packages(args.recipes_dir)
         return 0
 
+    # Under --json only the JSON document goes to stdout; banners, progress
+    # and diagnostics go to stderr so the output stays parseable
+    json_output = sys.stdout if args.json else None
+    with contextlib.redirect_stdout(sys.stderr) if args.json else contextlib.nullcontext():
+        # Share one connection pool across every HTTP request in the run
+        async with create_session() as session:
+            return await run(session, args, json_output)
+
+
+async def run(session: aiohttp.ClientSession, args: argparse.Namespace,
+              json_output: Optional[TextIO] = None) -> int:
+    """
+    Run the requested checks or updates using the shared HTTP session.
+
+    With json_output, results are written to it as JSON instead of printing
+    the summary.
+    """
     # Handle conda-forge only mode
     if args.conda_forge_only:
         await check_conda_forge_status_only(
-            args.recipes_dir, args.package_names, args.newer_only, args.quiet, args.json
+            session, args.recipes_dir, args.package_names, args.newer_only, args.quiet, json_output
         )
         return 0
 
     # Find recipe files to process
-    recipe_files = find_recipe_files(args.recipes_dir)
-
-    if args.package_names:
-        # Filter to specific packages
-        filtered_files = []
-        for name in args.package_names:
-            recipe_file = args.recipes_dir / name / "recipe.yaml"
-            if recipe_file.exists():
-                filtered_files.append(recipe_file)
-            else:
-                print(f"Package '{name}' not found")
-        recipe_files = filtered_files
+    recipe_files = select_recipe_files(args.recipes_dir, args.package_names)
 
     if not recipe_files:
         print("No recipe files found to process")
@@ -756,22 +1025,35 @@ async def main() -> int:
     else:
         print("👀 CHECK MODE - No files will be modified")
 
+    if len(recipe_files) >= CONDA_FORGE_INDEX_THRESHOLD:
+        await load_conda_forge_index(session, args.quiet)
+
     stats = UpdateStats()
 
-    for recipe_file in recipe_files:
-        await update_recipe(recipe_file, stats, args.dry_run or not args.update, args.quiet, args.force)
+    await update_recipes(session, recipe_files, stats, args.dry_run or not args.update, args.quiet, args.force)
 
-    # Filter results if newer_only is requested
-    if args.newer_only and stats.upstream_newer == 0 and len(stats.errors) == 0:
-        print("✅ All packages are already up-to-date!")
-        return 0
+    error_count = len(stats.errors)
+    upstream_newer = stats.upstream_newer
 
-    if not args.json:
+    if json_output is not None:
+        print(dump_json(stats.to_dict()), file=json_output)
+    elif args.newer_only and upstream_newer == 0 and error_count == 0:
+        # Short-circuit the common "nothing newer" case before any summary work
+        print("✅ All packages are already up-to-date!")
+    else:
         stats.print_summary()
 
     # Return error code if there were errors
-    return 1 if len(stats.errors) > 0 else 0
+    return 1 if error_count > 0 else 0
 
 
 if __name__ == "__main__":
+    # Prefer the libuv-backed event loop for the HTTP-heavy workload when
+    # installed; uvloop does not support Windows
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass
     sys.exit(asyncio.run(main()))
@@ -6,23 +6,81 @@ This module provides standardized YAML loading and dumping functions to ensure
 consistent formatting of recipe.yaml files across all tools in the project.
 """
 
+import functools
+import mmap
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 import sys
+import threading
+
+import yaml
 
 try:
     from ruamel.yaml import YAML
     from ruamel.yaml.error import YAMLError
     HAS_RUAMEL_YAML = True
 except ImportError:
-    import yaml
     from yaml import YAMLError
     HAS_RUAMEL_YAML = False
 
+# Prefer the libyaml-backed classes when PyYAML was built with them
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# Errors raised by load_yaml and load_yaml_fast; identical without ruamel.yaml
+YAML_ERRORS = (YAMLError, yaml.YAMLError)
+
+
+def _section_scalar_pattern(section: bytes, key: bytes) -> 're.Pattern[bytes]':
+    """
+    Match a plain or simply quoted scalar at section.key in block-style YAML.
+
+    Only the sibling keys preceding it at the same indentation are skipped;
+    anything else (nested values, comments, escapes, flow style) is left
+    unmatched so that the caller falls back to a real parser.
+    """
+    return re.compile(
+        rb'^' + section + rb':[ \t]*\r?\n'
+        rb'(?P<indent>[ \t]+)(?:[^\n]*\n(?P=indent)(?![ \t#\r\n]))*?'
+        + key + rb':[ \t]+'
+        rb'(?P<value>[^\s#\'"&*|>{\[!%@`][^\n#]*?|"[^"\\\n]*"|\'[^\'\n]*\')'
+        rb'(?:[ \t]+#[^\n]*)?[ \t]*\r?\n',
+        re.MULTILINE
+    )
+
+
+# Recipes keep context and package near the top; scanning this much of the
+# file with a regex answers most lookups without a YAML parser
+FAST_EXTRACT_SIZE = 2048
+PACKAGE_NAME_PATTERN = _section_scalar_pattern(b'package', b'name')
+CONTEXT_VERSION_PATTERN = _section_scalar_pattern(b'context', b'version')
+
+# Files at least this large are mapped into memory for load_yaml_fast rather
+# than read; below it the extra mapping costs more than the copy it saves
+MMAP_MIN_SIZE = 4096
+
+# Shared processor, built on first use; constructing one sets up a resolver
+# and representer, which is wasted work when repeated for every file
+_yaml_processor = None
+
+# The processor keeps parser and emitter state on the instance, so callers
+# loading recipes from worker threads must not use it at the same time
+_yaml_lock = threading.Lock()
+
 
 def create_yaml_processor():
-    """Create a configured YAML processor with consistent formatting settings."""
-    if HAS_RUAMEL_YAML:
+    """
+    Get the YAML processor with consistent formatting settings.
+
+    The processor is created on first call and reused afterwards; it is
+    None when ruamel.yaml is not installed.
+    """
+    global _yaml_processor
+    if _yaml_processor is None and HAS_RUAMEL_YAML:
         yaml_processor = YAML()
         # Preserve original formatting characteristics
         yaml_processor.preserve_quotes = True
@@ -33,11 +91,8 @@ def create_yaml_processor():
         yaml_processor.default_flow_style = False
         yaml_processor.allow_unicode = True
         yaml_processor.encoding = 'utf-8'
-        # Preserve comments and structure
-        yaml_processor.preserve_quotes = True
-        return yaml_processor
-    else:
-        return None
+        _yaml_processor = yaml_processor
+    return _yaml_processor
 
 
 def load_yaml(file_path: Union[str, Path]) -> Dict[str, Any]:
@@ -61,10 +116,117 @@ def load_yaml(file_path: Union[str, Path]) -> Dict[str, Any]:
 
     with open(file_path, 'r', encoding='utf-8') as f:
         if HAS_RUAMEL_YAML:
-            yaml_processor = create_yaml_processor()
-            return yaml_processor.load(f)
+            with _yaml_lock:
+                return create_yaml_processor().load(f)
         else:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=YamlLoader)
+
+
+def load_yaml_fast(file_path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Load YAML file for reading only.
+
+    Uses the libyaml C parser when available, which is much faster than the
+    round-trip parser behind load_yaml but drops comments and quoting, so the
+    result must never be written back to a recipe.
+
+    Args:
+        file_path: Path to YAML file
+
+    Returns:
+        Parsed YAML content as dictionary
+
+    Raises:
+        yaml.YAMLError: If YAML parsing fails
+        FileNotFoundError: If file doesn't exist
+    """
+    with open(file_path, 'rb') as f:
+        # libyaml takes the bytes directly, skipping the str decode
+        if os.fstat(f.fileno()).st_size < MMAP_MIN_SIZE:
+            return yaml.load(f.read(), Loader=YamlLoader)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return yaml.load(mapped, Loader=YamlLoader)
+
+
+def fast_extract_name_version(file_path: Union[str, Path]) -> Optional[Tuple[str, str]]:
+    """
+    Read package.name and context.version with a regex over the head of a recipe.
+
+    Returns None unless both are found as simple scalars within the first
+    FAST_EXTRACT_SIZE bytes; callers then need a real parser.
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(FAST_EXTRACT_SIZE)
+
+    name = PACKAGE_NAME_PATTERN.search(head)
+    version = CONTEXT_VERSION_PATTERN.search(head)
+    if not name or not version:
+        return None
+
+    values = []
+    for match in (name, version):
+        value = match.group('value').decode('utf-8')
+        if value[0] in '"\'':
+            value = value[1:-1]
+        values.append(value)
+    return values[0], values[1]
+
+
+def extract_name_version(file_path: Union[str, Path]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Read package.name and context.version from a recipe without loading it.
+
+    Tries fast_extract_name_version first; otherwise walks the parser's event
+    stream and stops as soon as both values have been seen, so no Python
+    objects are built for the rest of the recipe. Values
+    are returned as written, e.g. '1.10' stays a string rather than a float.
+
+    Args:
+        file_path: Path to recipe file
+
+    Returns:
+        (name, version), with None for any field the recipe does not define
+
+    Raises:
+        yaml.YAMLError: If YAML parsing fails
+        FileNotFoundError: If file doesn't exist
+    """
+    fast = fast_extract_name_version(file_path)
+    if fast:
+        return fast
+
+    wanted = {('package', 'name'), ('context', 'version')}
+    found: Dict[Tuple[str, ...], str] = {}
+    # One frame per open collection: [is_mapping, path to it, pending key]
+    stack: list = []
+
+    with open(file_path, 'rb') as f:
+        for event in yaml.parse(f, Loader=YamlLoader):
+            if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+                if stack:
+                    is_mapping, path, key = stack[-1]
+                    path = path + (key if is_mapping else '[]',)
+                else:
+                    path = ()
+                stack.append([isinstance(event, yaml.MappingStartEvent), path, None])
+            elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+                stack.pop()
+                # The closed collection was the value of the parent's key
+                if stack and stack[-1][0]:
+                    stack[-1][2] = None
+            elif isinstance(event, (yaml.ScalarEvent, yaml.AliasEvent)) and stack and stack[-1][0]:
+                frame = stack[-1]
+                if frame[2] is None:
+                    frame[2] = getattr(event, 'value', None)
+                    continue
+                full_path = frame[1] + (frame[2],)
+                if full_path in wanted and isinstance(event, yaml.ScalarEvent):
+                    found[full_path] = event.value
+                    if len(found) == len(wanted):
+                        break
+                frame[2] = None
+
+    return found.get(('package', 'name')), found.get(('context', 'version'))
 
 
 def dump_yaml(data: Dict[str, Any], file_path: Union[str, Path]) -> None:
@@ -83,21 +245,88 @@ def dump_yaml(data: Dict[str, Any], file_path: Union[str, Path]) -> None:
     # Ensure parent directory exists
     file_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(file_path, 'w', encoding='utf-8') as f:
-        if HAS_RUAMEL_YAML:
-            yaml_processor = create_yaml_processor()
-            yaml_processor.dump(data, f)
-        else:
-            # Fallback to standard yaml with consistent formatting
-            yaml.dump(
-                data,
-                f,
-                default_flow_style=False,
-                allow_unicode=True,
-                indent=2,
-                sort_keys=False,
-                width=4096
-            )
+    # Render first, then swap the finished file into place, so a failed dump
+    # or a concurrent reader never sees a truncated recipe
+    write_file_atomic(file_path, dump_yaml_string(data).encode('utf-8'))
+
+
+def write_file_atomic(file_path: Path, content: bytes) -> None:
+    """Replace a file's content in one step, keeping its permissions."""
+    tmp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        if file_path.exists():
+            shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def patch_yaml_scalars(text: str, changes: List[Tuple[str, Any, str]]) -> Optional[str]:
+    """
+    Replace scalar values in YAML text, leaving every other byte untouched.
+
+    Each change is (key, old value, new value). The old value must appear on
+    exactly one 'key: value' line, plain or quoted, and the new value keeps
+    that quoting. Much cheaper than a round-trip load and dump, and it cannot
+    reformat anything it was not asked to change.
+
+    Args:
+        text: YAML document
+        changes: Values to replace
+
+    Returns:
+        Patched text, or None when a change cannot be made unambiguously
+    """
+    for key, old, new in changes:
+        if isinstance(old, bool) or not isinstance(old, (str, int, float)):
+            return None
+        old = str(old)
+        if old == new:
+            continue
+        pattern = re.compile(
+            r'^(?P<prefix>[ \t]*(?:- )?' + re.escape(key) + r':[ \t]+)'
+            r'(?P<quote>["\']?)' + re.escape(old) + r'(?P=quote)'
+            r'(?P<suffix>(?:[ \t]+#[^\n]*)?[ \t]*\r?)$',
+            re.MULTILINE
+        )
+        matches = list(pattern.finditer(text))
+        if len(matches) != 1:
+            return None
+
+        match = matches[0]
+        quote = match.group('quote')
+        if quote:
+            # Only values that need no escaping inside the existing quotes
+            if quote in new or (quote == '"' and '\\' in new):
+                return None
+        elif yaml.load(new, Loader=YamlLoader) != new or ' #' in new:
+            # Quote values that would not read back as the same plain string
+            if '"' in new or '\\' in new:
+                return None
+            quote = '"'
+        text = text[:match.start()] + match.group('prefix') + quote + new + quote + match.group('suffix') + text[match.end():]
+    return text
+
+
+def patch_yaml_file(file_path: Union[str, Path], changes: List[Tuple[str, Any, str]]) -> bool:
+    """
+    Apply patch_yaml_scalars to a file in place.
+
+    Returns:
+        True if the file was patched, False if the caller must rewrite it
+    """
+    file_path = Path(file_path)
+    try:
+        patched = patch_yaml_scalars(file_path.read_text(encoding='utf-8'), changes)
+    except (UnicodeDecodeError, yaml.YAMLError):
+        return False
+    if patched is None:
+        return False
+    write_file_atomic(file_path, patched.encode('utf-8'))
+    return True
 
 
 def dump_yaml_string(data: Dict[str, Any]) -> str:
@@ -112,13 +341,14 @@ def dump_yaml_string(data: Dict[str, Any]) -> str:
     """
     if HAS_RUAMEL_YAML:
         from io import StringIO
-        yaml_processor = create_yaml_processor()
         stream = StringIO()
-        yaml_processor.dump(data, stream)
+        with _yaml_lock:
+            create_yaml_processor().dump(data, stream)
         return stream.getvalue()
     else:
         return yaml.dump(
             data,
+            Dumper=YamlDumper,
             default_flow_style=False,
             allow_unicode=True,
             indent=2,
@@ -140,7 +370,7 @@ def validate_yaml_format(file_path: Union[str, Path]) -> bool:
     try:
         load_yaml(file_path)
         return True
-    except (YAMLError, FileNotFoundError, Exception):
+    except Exception:
         return False
 
 
@@ -158,14 +388,20 @@ def format_yaml_file(file_path: Union[str, Path], backup: bool = True) -> bool:
     file_path = Path(file_path)
 
     try:
+        # Render with consistent formatting before touching anything on disk
+        original = file_path.read_bytes()
+        formatted = dump_yaml_string(load_yaml(file_path)).encode('utf-8')
+
+        # Already formatted: no backup and no rewrite
+        if formatted == original:
+            return True
+
         # Create backup if requested
         if backup:
             backup_path = file_path.with_suffix(f"{file_path.suffix}.backup")
-            backup_path.write_text(file_path.read_text(encoding='utf-8'), encoding='utf-8')
+            backup_path.write_bytes(original)
 
-        # Load and re-save with consistent formatting
-        data = load_yaml(file_path)
-        dump_yaml(data, file_path)
+        write_file_atomic(file_path, formatted)
         return True
 
     except Exception as e:
@@ -173,6 +409,19 @@ def format_yaml_file(file_path: Union[str, Path], backup: bool = True) -> bool:
         return False
 
 
+def map_files(func, file_paths: list) -> list:
+    """
+    Apply func to each file, across processes when there is more than one.
+
+    Parsing and emitting YAML is CPU-bound pure Python under ruamel.yaml,
+    so threads would serialise on the GIL.
+    """
+    if len(file_paths) < 2:
+        return [func(file_path) for file_path in file_paths]
+    with ProcessPoolExecutor() as executor:
+        return list(executor.map(func, file_paths, chunksize=4))
+
+
 def main():
     """CLI interface for YAML formatting utilities."""
     import argparse
@@ -199,25 +448,27 @@ Examples:
 
     args = parser.parse_args()
 
+    format_file = functools.partial(format_yaml_file, backup=not args.no_backup)
+
+    # Per-file results are collected and written to stdout in one go
     if args.format:
-        for file_path in args.format:
-            print(f"Formatting {file_path}...")
-            if format_yaml_file(file_path, backup=not args.no_backup):
-                print(f"✅ Successfully formatted {file_path}")
-            else:
-                print(f"❌ Failed to format {file_path}")
+        print(f"Formatting {len(args.format)} file(s)...")
+        messages = [
+            f"✅ Successfully formatted {file_path}\n" if formatted else f"❌ Failed to format {file_path}\n"
+            for file_path, formatted in zip(args.format, map_files(format_file, args.format))
+        ]
+        sys.stdout.write("".join(messages))
 
     elif args.validate:
-        all_valid = True
-        for file_path in args.validate:
-            if validate_yaml_format(file_path):
-                print(f"✅ {file_path} is valid YAML")
-            else:
-                print(f"❌ {file_path} has YAML errors")
-                all_valid = False
-        sys.exit(0 if all_valid else 1)
-
-    elif args.format_all:
+        results = map_files(validate_yaml_format, args.validate)
+        messages = [
+            f"✅ {file_path} is valid YAML\n" if valid else f"❌ {file_path} has YAML errors\n"
+            for file_path, valid in zip(args.validate, results)
+        ]
+        sys.stdout.write("".join(messages))
+        sys.exit(0 if all(results) else 1)
+
+    elif args.format_each:
         pkgs_dir = Path("pkgs")
         if not pkgs_dir.exists():
             print("Error: pkgs/ directory not found")
@@ -226,11 +477,7 @@ Examples:
         recipe_files = list(pkgs_dir.glob("*/recipe.yaml"))
         print(f"Found {len(recipe_files)} recipe files to format")
 
-        success_count = 0
-        for recipe_file in recipe_files:
-            print(f"Formatting {recipe_file}...")
-            if format_yaml_file(recipe_file, backup=not args.no_backup):
-                success_count += 1
+        success_count = sum(map_files(format_file, recipe_files))
 
         print(f"✅ Successfully formatted {success_count}/{len(recipe_files)} files")
 